@@ -0,0 +1,207 @@
+#!/usr/bin/env python3
+"""
+CONCURRENCY / BATCH_POP 在线自动调参。
+
+每 interval 秒采样一次：成功尝试速率（ok attempts/s，爬山目标）、事件循环延迟、RSS 内存、
+尝试失败率与 429 比例。任一护栏越界就乘性收缩；否则在两个维度上轮流爬山：
+速率比上一步提升就沿原方向继续，下降就反向，变化在噪声范围内保持方向。
+每次决策打印一行 AUTOTUNE，并可追加到 JSONL 日志文件。
+
+worker 侧的接入方式：启动 max_concurrency 个协程，编号 >= tuner.concurrency 的协程
+在取下一批任务前 await tuner.wait_active(slot, stop_event, IDLE_QUIT_AFTER) 挂起；取批大小读 tuner.batch_pop。
+调参器连续 idle_quit 秒没看到任何进展（尝试数、完成数都不变）时 wait_active 返回 False，
+挂起的协程与活跃协程一样按空闲退出，worker 的 gather 才能结束。
+"""
+import asyncio
+import json
+import os
+import time
+from collections import deque
+from typing import Optional
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+
+def rss_mb() -> float:
+    """当前 RSS（MB）。Linux 读 /proc，其他平台退化为峰值 RSS。"""
+    try:
+        with open('/proc/self/statm') as f:
+            pages = int(f.read().split()[1])
+        return pages * os.sysconf('SC_PAGE_SIZE') / (1 << 20)
+    except (OSError, ValueError, AttributeError):
+        pass
+    if resource is not None:
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak / (1 << 20) if os.uname().sysname == 'Darwin' else peak / 1024
+    return 0.0
+
+
+class AutoTuner:
+    def __init__(self, stats: dict, concurrency: int, batch_pop: int, *,
+                 concurrency_bounds: tuple, batch_pop_bounds: tuple,
+                 interval: float = 15.0, step: float = 0.1, tolerance: float = 0.03,
+                 max_loop_lag: float = 0.25, max_rss_mb: float = 4096,
+                 max_error_rate: float = 0.6, max_429_rate: float = 0.02,
+                 shrink: float = 0.7, log_path: Optional[str] = None):
+        self.stats = stats
+        self.c_min, self.c_max = concurrency_bounds
+        self.b_min, self.b_max = batch_pop_bounds
+        self.concurrency = min(max(concurrency, self.c_min), self.c_max)
+        self.batch_pop = min(max(batch_pop, self.b_min), self.b_max)
+
+        self.interval = interval
+        self.step = step
+        self.tolerance = tolerance
+        self.max_loop_lag = max_loop_lag
+        self.max_rss_mb = max_rss_mb
+        self.max_error_rate = max_error_rate
+        self.max_429_rate = max_429_rate
+        self.shrink = shrink
+        self.log_path = log_path
+
+        self.decisions: deque = deque(maxlen=1000)
+        self._changed = asyncio.Event()
+        self._lag = 0.0
+        self._dim = 0                    # 0: concurrency, 1: batch_pop（轮流调）
+        self._direction = [1, 1]
+        self._last_rate: Optional[float] = None
+        self._last = self._snapshot()
+        self._idle_since = self._last['t']   # 最近一次看到进展的时刻
+
+    # ---------- worker 侧 ----------
+    async def wait_active(self, slot: int, stop_event: asyncio.Event, idle_quit: float = float('inf')) -> bool:
+        """挂起到 slot < concurrency 或 stop_event；已连续 idle_quit 秒没有进展时返回 False。"""
+        while slot >= self.concurrency and not stop_event.is_set():
+            if time.perf_counter() - self._idle_since >= idle_quit:
+                return False
+            await self._changed.wait()
+        return True
+
+    def wake_all(self):
+        ev, self._changed = self._changed, asyncio.Event()
+        ev.set()
+
+    # ---------- 采样 ----------
+    def _snapshot(self) -> dict:
+        s = self.stats
+        return {
+            't': time.perf_counter(),
+            'attempts': s['attempts'],
+            'done': s['done'],
+            'errors': s['errors'],
+            'status_429': s['status_429'],
+        }
+
+    async def _lag_probe(self, stop_event: asyncio.Event, period: float = 0.1):
+        # 取每个决策周期内的最大延迟，下个周期重新累计
+        while not stop_event.is_set():
+            t0 = time.perf_counter()
+            await asyncio.sleep(period)
+            self._lag = max(self._lag, time.perf_counter() - t0 - period)
+
+    async def run(self, stop_event: asyncio.Event):
+        probe = asyncio.create_task(self._lag_probe(stop_event))
+        try:
+            while not stop_event.is_set():
+                try:
+                    await asyncio.wait_for(stop_event.wait(), timeout=self.interval)
+                except asyncio.TimeoutError:
+                    self.decide()
+        finally:
+            probe.cancel()
+            self.wake_all()
+
+    # ---------- 决策 ----------
+    def decide(self) -> Optional[dict]:
+        now = self._snapshot()
+        prev, self._last = self._last, now
+        dt = now['t'] - prev['t']
+        attempts = now['attempts'] - prev['attempts']
+        lag, self._lag = self._lag, 0.0
+        if dt <= 0:
+            return None
+        progressed = attempts or now['done'] != prev['done']
+        if progressed:
+            self._idle_since = now['t']
+
+        rate = (attempts - (now['errors'] - prev['errors'])) / dt
+        err_rate = (now['errors'] - prev['errors']) / attempts if attempts else 0.0
+        rate_429 = (now['status_429'] - prev['status_429']) / attempts if attempts else 0.0
+        mem = rss_mb()
+
+        old_c, old_b = self.concurrency, self.batch_pop
+        guard = []
+        if lag > self.max_loop_lag:
+            guard.append(f"loop_lag={lag:.3f}s")
+        if self.max_rss_mb and mem > self.max_rss_mb:
+            guard.append(f"rss={mem:.0f}MB")
+        if attempts >= 50 and err_rate > self.max_error_rate:
+            guard.append(f"error_rate={err_rate:.1%}")
+        if attempts >= 50 and rate_429 > self.max_429_rate:
+            guard.append(f"429_rate={rate_429:.2%}")
+
+        if guard:
+            self.concurrency = max(self.c_min, int(self.concurrency * self.shrink))
+            self.batch_pop = max(self.b_min, int(self.batch_pop * self.shrink))
+            self._direction = [-1, -1]
+            reason = "guard:" + ",".join(guard)
+            # 护栏触发后的速率不作为爬山基准
+            self._last_rate = None
+        elif attempts == 0:
+            reason = "idle:hold"
+        else:
+            if self._last_rate is None:
+                reason = "baseline"
+            elif rate > self._last_rate * (1 + self.tolerance):
+                reason = "improved"
+            elif rate < self._last_rate * (1 - self.tolerance):
+                self._direction[self._dim] *= -1
+                reason = "worse:reverse"
+            else:
+                reason = "flat"
+            self._last_rate = rate
+
+            self._dim ^= 1
+            d = self._direction[self._dim]
+            if self._dim == 0:
+                delta = max(1, int(self.concurrency * self.step))
+                self.concurrency = min(self.c_max, max(self.c_min, self.concurrency + d * delta))
+            else:
+                delta = max(1, int(self.batch_pop * self.step))
+                self.batch_pop = min(self.b_max, max(self.b_min, self.batch_pop + d * delta))
+
+        if self.concurrency > old_c or not progressed:
+            # 没有进展时也唤醒挂起的协程，让它们按 idle_quit 检查是否该退出
+            self.wake_all()
+
+        decision = {
+            'ts': time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+            'concurrency': [old_c, self.concurrency],
+            'batch_pop': [old_b, self.batch_pop],
+            'rate': round(rate, 1), 'loop_lag': round(lag, 4), 'rss_mb': round(mem, 1),
+            'error_rate': round(err_rate, 4), 'rate_429': round(rate_429, 4),
+            'reason': reason,
+        }
+        self.decisions.append(decision)
+        self._log(decision)
+        return decision
+
+    def _log(self, d: dict):
+        print(
+            f"AUTOTUNE: concurrency {d['concurrency'][0]}->{d['concurrency'][1]} | "
+            f"batch_pop {d['batch_pop'][0]}->{d['batch_pop'][1]} | "
+            f"成功速度={d['rate']:.1f}/s | loop_lag={d['loop_lag'] * 1000:.0f}ms | rss={d['rss_mb']:.0f}MB | "
+            f"失败率={d['error_rate']:.1%} | 429={d['rate_429']:.2%} | {d['reason']}"
+        )
+        if self.log_path:
+            try:
+                with open(self.log_path, 'a', encoding='utf-8') as f:
+                    f.write(json.dumps(d, ensure_ascii=False) + "\n")
+            except OSError:
+                pass
+
+    def summary(self) -> str:
+        return f"autotune: concurrency={self.concurrency}, batch_pop={self.batch_pop}, decisions={len(self.decisions)}"
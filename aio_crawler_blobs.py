@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+按内容去重存储正文：停放域名、CDN 错误页、镜像站等大量 URL 返回同一份 HTML，只存一次。
+
+  <结果库前缀>blobs.blobs   {_id: blake2b-128 十六进制, html, size, refs, created_at}
+  pages 文档                 html 换成 {blob: <_id>, html_len: <字节数>}；小于 min_bytes 的正文仍内联
+
+每个写库批次：
+  1. 批内算哈希、合并相同正文
+  2. 一次 find({_id: {$in: ...}}) 查出已存在的 blob
+  3. 一次 bulk_write：已存在的只 $inc refs（不再传正文）；新的 upsert（$setOnInsert 正文，
+     与其它从机同时插入同一 blob 也安全）
+  4. 之后插 pages；重复 _id 等写失败的页面再把对应 refs 减回去 —— refs 只会偏大，不会偏小
+
+哈希用标准库 blake2b：各从机不依赖可选扩展也能得到相同的 _id。
+"""
+import hashlib
+from collections import Counter
+
+from pymongo import UpdateOne
+
+from aio_crawler_records import utc_ts
+
+
+def blob_id(data: bytes) -> str:
+    return hashlib.blake2b(data, digest_size=16).hexdigest()
+
+
+class BlobStore:
+    def __init__(self, min_bytes: int = 1024):
+        self.min_bytes = min_bytes
+        self.counters = {'pages': 0, 'hits': 0, 'blobs': 0, 'bytes_in': 0, 'bytes_stored': 0}
+
+    async def externalize(self, coll, docs: list) -> list:
+        """就地把 docs 里的 html 换成 blob 引用；返回与 docs 对齐的 blob _id 列表（仍内联的为 None）。"""
+        refs = [None] * len(docs)
+        bodies = {}
+        counts: Counter = Counter()
+        for i, doc in enumerate(docs):
+            html = doc.get('html')
+            if not isinstance(html, str):
+                continue
+            data = html.encode('utf-8')
+            if len(data) < self.min_bytes:
+                continue
+            h = blob_id(data)
+            refs[i] = h
+            counts[h] += 1
+            bodies.setdefault(h, (html, len(data)))
+            del doc['html']
+            doc['blob'] = h
+            doc['html_len'] = len(data)
+        if not counts:
+            return refs
+
+        existing = {d['_id'] async for d in coll.find({'_id': {'$in': list(counts)}}, {'_id': 1})}
+        ops = []
+        c = self.counters
+        for h, n in counts.items():
+            size = bodies[h][1]
+            c['pages'] += n
+            c['bytes_in'] += size * n
+            if h in existing:
+                ops.append(UpdateOne({'_id': h}, {'$inc': {'refs': n}}))
+                c['hits'] += n
+            else:
+                ops.append(UpdateOne(
+                    {'_id': h},
+                    {'$setOnInsert': {'html': bodies[h][0], 'size': size, 'created_at': utc_ts()},
+                     '$inc': {'refs': n}},
+                    upsert=True,
+                ))
+                c['hits'] += n - 1
+                c['blobs'] += 1
+                c['bytes_stored'] += size
+        await coll.bulk_write(ops, ordered=False)
+        return refs
+
+    async def unref(self, coll, ids: list):
+        counts = Counter(h for h in ids if h)
+        if counts:
+            await coll.bulk_write([UpdateOne({'_id': h}, {'$inc': {'refs': -n}}) for h, n in counts.items()],
+                                  ordered=False)
+
+
+def blob_summary(counters: dict) -> str:
+    c = counters
+    ratio = c['hits'] / c['pages'] if c['pages'] else 0.0
+    saved = (c['bytes_in'] - c['bytes_stored']) / (1 << 20)
+    return f"去重: 页面={c['pages']:,} 新blob={c['blobs']:,} 命中={c['hits']:,}({ratio:.1%}) 节省≈{saved:,.1f}MB"
@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+"""
+按 host 熔断：整站宕机（连接被拒 / TLS 错误 / 超时）时，不再让它的每个 URL 都占着抓取协程等满 TIMEOUT。
+
+  closed     正常放行；连续 threshold 次网络错误（status 为 None）即打开。收到任何 HTTP 响应都清零
+  open       冷却期内 before() 返回 SHORT：调用方直接判失败或把条目停放（见 worker 的 BREAKER_MODE）
+  half-open  冷却到期后同时放行 probes 个探测请求：成功即恢复 closed；失败重新打开，冷却时间翻倍（不超过上限）
+
+同一进程内所有协程共用一个 HostBreaker；redis 非空时打开 / 恢复经 pub/sub 频道广播给其它从机
+（消息 'open <host> <到期时间戳> <worker_id>' / 'close <host> <worker_id>'），各进程各自做半开探测。
+
+“节省的抓取时间”按该 host 失败请求的平均耗时估算（尚无本地样本时用 fail_cost，即超时时间）。
+"""
+import asyncio
+import time
+from typing import Tuple
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+PASS = 'pass'
+PROBE = 'probe'
+SHORT = 'short'
+
+
+class _HostState:
+    __slots__ = ('state', 'failures', 'open_until', 'cooldown', 'probes', 'fail_secs', 'fail_n')
+
+    def __init__(self, cooldown: float):
+        self.state = CLOSED
+        self.failures = 0
+        self.open_until = 0.0        # time.time()：停放条目的到期时间要跨进程比较
+        self.cooldown = cooldown
+        self.probes = 0              # 半开状态下在途的探测请求数
+        self.fail_secs = 0.0
+        self.fail_n = 0
+
+
+class HostBreaker:
+    def __init__(self, *, threshold: int = 5, cooldown: float = 30.0, max_cooldown: float = 120.0,
+                 probes: int = 1, fail_cost: float = 10.0, max_hosts: int = 100_000,
+                 redis=None, channel: str = 'crawler:breaker', worker_id: str = ''):
+        self.threshold = max(1, threshold)
+        self.cooldown = cooldown
+        self.max_cooldown = max(cooldown, max_cooldown)
+        self.probes = max(1, probes)
+        self.fail_cost = fail_cost
+        self.max_hosts = max_hosts
+        self.redis = redis
+        self.channel = channel
+        self.worker_id = worker_id
+
+        self._hosts: dict = {}       # host -> _HostState（只保存有失败记录或未关闭的 host）
+        self.counters = {
+            'opened': 0, 'closed': 0, 'remote': 0, 'probes': 0,
+            'short': 0, 'parked': 0, 'saved_seconds': 0.0, 'open_hosts': 0,
+        }
+
+    # ---------- 抓取前 ----------
+    def before(self, host: str) -> Tuple[str, float]:
+        """返回 (PASS / PROBE / SHORT, 停放到期时间戳)；SHORT 时调用方不发请求。"""
+        st = self._hosts.get(host)
+        if st is None or st.state == CLOSED:
+            return PASS, 0.0
+        now = time.time()
+        if st.state == OPEN and now >= st.open_until:
+            st.state = HALF_OPEN
+        if st.state == HALF_OPEN:
+            if st.probes < self.probes:
+                st.probes += 1
+                self.counters['probes'] += 1
+                return PROBE, 0.0
+            until = now + self.cooldown
+        else:
+            until = st.open_until
+        self.counters['short'] += 1
+        self.counters['saved_seconds'] += st.fail_secs / st.fail_n if st.fail_n else self.fail_cost
+        return SHORT, until
+
+    # ---------- 抓取后 ----------
+    async def record(self, host: str, verdict: str, failed, elapsed: float = 0.0):
+        """failed: True=网络错误，False=拿到 HTTP 响应，None=未实际发请求（只归还探测名额）。"""
+        st = self._hosts.get(host)
+        if verdict == PROBE and st is not None and st.probes > 0:
+            st.probes -= 1
+        if failed is None:
+            return
+        if not failed:
+            if st is None:
+                return
+            del self._hosts[host]
+            if st.state != CLOSED:
+                self.counters['closed'] += 1
+                self.counters['open_hosts'] -= 1
+                await self._publish(f'close {host} {self.worker_id}')
+            return
+
+        if st is None:
+            st = self._hosts[host] = _HostState(self.cooldown)
+            if len(self._hosts) > self.max_hosts:
+                self._hosts = {h: s for h, s in self._hosts.items() if s.state != CLOSED or h == host}
+        st.fail_secs += elapsed
+        st.fail_n += 1
+        if st.state == CLOSED:
+            st.failures += 1
+            if st.failures >= self.threshold:
+                self.counters['open_hosts'] += 1
+                await self._open(host, st)
+        elif verdict == PROBE:
+            st.cooldown = min(st.cooldown * 2, self.max_cooldown)
+            await self._open(host, st)
+
+    async def _open(self, host: str, st: _HostState):
+        st.state = OPEN
+        st.open_until = time.time() + st.cooldown
+        self.counters['opened'] += 1
+        await self._publish(f'open {host} {st.open_until:.3f} {self.worker_id}')
+
+    def note_parked(self, n: int):
+        self.counters['parked'] += n
+
+    # ---------- 跨从机共享 ----------
+    async def _publish(self, msg: str):
+        if self.redis is None:
+            return
+        try:
+            await self.redis.publish(self.channel, msg)
+        except Exception:
+            pass
+
+    def _apply(self, msg: str):
+        parts = msg.split()
+        if len(parts) == 4 and parts[0] == 'open' and parts[3] != self.worker_id:
+            host, until = parts[1], float(parts[2])
+            st = self._hosts.get(host)
+            if st is None:
+                st = self._hosts[host] = _HostState(self.cooldown)
+            if st.state == CLOSED:
+                self.counters['open_hosts'] += 1
+            elif until <= st.open_until:
+                return
+            st.state = OPEN
+            st.open_until = until
+            self.counters['remote'] += 1
+        elif len(parts) == 3 and parts[0] == 'close' and parts[2] != self.worker_id:
+            st = self._hosts.pop(parts[1], None)
+            if st is not None and st.state != CLOSED:
+                self.counters['open_hosts'] -= 1
+
+    async def listen(self, stop_event: asyncio.Event):
+        if self.redis is None:
+            return
+        pubsub = self.redis.pubsub()
+        await pubsub.subscribe(self.channel)
+        try:
+            while not stop_event.is_set():
+                msg = await pubsub.get_message(ignore_subscribe_messages=True, timeout=1.0)
+                if msg is None:
+                    continue
+                data = msg.get('data')
+                try:
+                    self._apply(data.decode() if isinstance(data, bytes) else str(data))
+                except ValueError:
+                    pass
+        finally:
+            try:
+                await pubsub.unsubscribe(self.channel)
+                await pubsub.reset()
+            except Exception:
+                pass
+
+
+def breaker_summary(counters: dict) -> str:
+    c = counters
+    return (f"熔断: 打开中={c['open_hosts']:,} 打开={c['opened']:,}(远端={c['remote']:,}) 恢复={c['closed']:,} "
+            f"探测={c['probes']:,} 短路={c['short']:,} 停放={c['parked']:,} 节省≈{c['saved_seconds']:.0f}s")
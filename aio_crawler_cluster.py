@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+"""
+集群级完成检测：租约登记 + 事件通知，取代每个空闲协程的 GET DONE_KEY + LLEN 轮询。
+
+Redis 键（均以 TASK_LIST 为前缀）：
+  <list>:leases        HASH  worker_id -> 该进程已弹出但未处理完的条目数（租约）
+  <list>:alive:<id>    STR   进程心跳，带 TTL；过期即视为进程已死，其租约作废
+  <list>:finished      STR   全局完成标志
+  <list>:events        PUB/SUB 频道：'complete'（全局完成）、'enqueue_complete'（master 入队结束）
+  <list>:parked        ZSET  暂缓的条目（score 为到期时间戳，见 aio_crawler_breaker.py）；
+                       每个进程随心跳把到期的条目移回队列，非空时不算完成
+
+每个进程只有一个协调协程：按心跳周期续租；本进程空闲（最近一次弹出为空且本地在途为 0）时
+执行一次 Lua 检查：DONE_KEY 已设置 + 队列与暂缓集合为空 + 所有存活进程租约为 0。
+弹出与登记租约之间有极短的窗口，因此要求连续两次检查（间隔至少一个心跳周期）都满足才提交，
+提交时写 finished 并 PUBLISH 'complete'，所有进程收到后停止。
+"""
+import asyncio
+import os
+import socket
+import time
+from typing import Optional
+
+# 返回 0=未完成 1=已完成 2=本次满足条件（候选）
+_CHECK_LUA = """
+if redis.call('EXISTS', KEYS[4]) == 1 then return 1 end
+if redis.call('EXISTS', KEYS[1]) == 0 then return 0 end
+if redis.call('LLEN', KEYS[2]) > 0 then return 0 end
+if redis.call('ZCARD', KEYS[5]) > 0 then return 0 end
+local leases = redis.call('HGETALL', KEYS[3])
+for i = 1, #leases, 2 do
+  if tonumber(leases[i + 1]) > 0 then
+    if redis.call('EXISTS', ARGV[1] .. leases[i]) == 1 then return 0 end
+    redis.call('HDEL', KEYS[3], leases[i])
+  end
+end
+if ARGV[3] == '1' then
+  redis.call('SET', KEYS[4], '1')
+  redis.call('PUBLISH', ARGV[2], 'complete')
+  return 1
+end
+return 2
+"""
+
+# 把到期的暂缓条目移回队列左端（与重试回插同一端），返回条数
+_RELEASE_LUA = """
+local due = redis.call('ZRANGEBYSCORE', KEYS[1], '-inf', ARGV[1], 'LIMIT', 0, tonumber(ARGV[2]))
+if #due == 0 then return 0 end
+redis.call('ZREM', KEYS[1], unpack(due))
+redis.call('LPUSH', KEYS[2], unpack(due))
+return #due
+"""
+
+
+def default_worker_id(run_id=None) -> str:
+    return f"{socket.gethostname()}:{os.getpid()}" + (f":{run_id}" if run_id else "")
+
+
+class CompletionCoordinator:
+    def __init__(self, redis_conn, task_list: str, done_key: str, stats: dict, *,
+                 worker_id: str, heartbeat: float = 1.0, lease_ttl: int = 15):
+        self.redis = redis_conn
+        self.task_list = task_list
+        self.done_key = done_key
+        self.stats = stats
+        self.worker_id = worker_id
+        self.heartbeat = heartbeat
+        self.lease_ttl = lease_ttl
+
+        self.leases_key = f'{task_list}:leases'
+        self.alive_prefix = f'{task_list}:alive:'
+        self.finished_key = f'{task_list}:finished'
+        self.channel = f'{task_list}:events'
+        self.parked_key = f'{task_list}:parked'
+
+        self._check = redis_conn.register_script(_CHECK_LUA)
+        self._release = redis_conn.register_script(_RELEASE_LUA)
+        self._last_pop = 0.0
+        self._last_empty = 0.0
+        self._candidate_at: Optional[float] = None
+
+    # ---------- worker 协程侧（弹出前后各一次，空闲时不访问 Redis） ----------
+    async def leased(self, n: int):
+        self._last_pop = time.monotonic()
+        self._candidate_at = None
+        await self.redis.hincrby(self.leases_key, self.worker_id, n)
+
+    async def released(self, n: int):
+        await self.redis.hincrby(self.leases_key, self.worker_id, -n)
+
+    def note_idle(self):
+        self._last_empty = time.monotonic()
+
+    def _locally_idle(self) -> bool:
+        return self.stats['in_flight'] == 0 and self._last_empty > self._last_pop
+
+    # ---------- 协调协程 ----------
+    async def _beat(self):
+        await self.redis.set(self.alive_prefix + self.worker_id, '1', ex=self.lease_ttl)
+        await self._release(keys=[self.parked_key, self.task_list], args=[time.time(), 1000])
+
+    async def _try_complete(self) -> bool:
+        if not self._locally_idle():
+            self._candidate_at = None
+            return False
+        now = time.monotonic()
+        commit = self._candidate_at is not None and now - self._candidate_at >= self.heartbeat
+        res = int(await self._check(
+            keys=[self.done_key, self.task_list, self.leases_key, self.finished_key, self.parked_key],
+            args=[self.alive_prefix, self.channel, '1' if commit else '0'],
+        ))
+        if res == 1:
+            return True
+        if res == 2:
+            if self._candidate_at is None:
+                self._candidate_at = now
+        else:
+            self._candidate_at = None
+        return False
+
+    async def run(self, stop_event: asyncio.Event):
+        await self.redis.hset(self.leases_key, self.worker_id, 0)
+        await self._beat()
+        pubsub = self.redis.pubsub()
+        await pubsub.subscribe(self.channel)
+        try:
+            if await self.redis.exists(self.finished_key):
+                stop_event.set()
+                return
+            next_beat = time.monotonic() + self.heartbeat
+            while not stop_event.is_set():
+                timeout = max(0.0, next_beat - time.monotonic())
+                msg = await pubsub.get_message(ignore_subscribe_messages=True, timeout=timeout)
+                if msg is not None:
+                    data = msg.get('data')
+                    if data in (b'complete', 'complete'):
+                        stop_event.set()
+                        break
+                    # 'enqueue_complete' 等：立刻检查一次，不等下个心跳
+                    if await self._try_complete():
+                        stop_event.set()
+                        break
+                    continue
+                if time.monotonic() >= next_beat:
+                    next_beat = time.monotonic() + self.heartbeat
+                    await self._beat()
+                    if await self._try_complete():
+                        stop_event.set()
+                        break
+        finally:
+            try:
+                await pubsub.unsubscribe(self.channel)
+                await pubsub.reset()
+            except Exception:
+                pass
+
+    async def close(self):
+        try:
+            await self.redis.hdel(self.leases_key, self.worker_id)
+            await self.redis.delete(self.alive_prefix + self.worker_id)
+        except Exception:
+            pass
@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+"""
+运行时配置层：脚本里的大写模块常量就是默认值，按以下顺序逐层覆盖（后者优先）：
+
+  1) 模块常量（默认值）
+  2) TOML 配置文件的 [default] 段（--config / CRAWLER_CONFIG）
+  3) profile：脚本内置的 PROFILES，再叠加 TOML 的 [profiles.<name>] 段（--profile / CRAWLER_PROFILE）
+  4) 环境变量 CRAWLER_<NAME>（另兼容 README 里的 REDIS_URL / MONGO_URI）
+  5) 命令行参数 --<name>，如 --concurrency 500 --batch-pop 100 --run-id 177
+
+TOML 中的键不区分大小写（concurrency 与 CONCURRENCY 等价）。
+字符串来源（环境变量 / 命令行）按默认值的类型转换：bool 接受 1/0/true/false/yes/no/on/off，
+集合/列表用逗号分隔，dict 用 JSON。
+"""
+import argparse
+import json
+import os
+from typing import Optional
+
+try:
+    import tomllib                      # Python 3.11+
+except ImportError:
+    try:
+        import tomli as tomllib         # pip install tomli
+    except ImportError:
+        tomllib = None
+
+ENV_PREFIX = 'CRAWLER_'
+# README 里直接 export 的变量名
+PLAIN_ENV = ('REDIS_URL', 'MONGO_URI')
+
+_SCALARS = (bool, int, float, str)
+_SEQS = (set, frozenset, list, tuple)
+
+# 大写但不是配置项的模块名
+NOT_OPTIONS = {'PROFILES'}
+
+
+def collect_defaults(namespace: dict) -> dict:
+    """模块里所有大写、且为基本类型/容器的常量都视为可配置项。"""
+    return {
+        k: v for k, v in namespace.items()
+        if k.isupper() and not k.startswith('_') and k not in NOT_OPTIONS
+        and isinstance(v, _SCALARS + _SEQS + (dict,))
+    }
+
+
+def _to_bool(s: str) -> bool:
+    v = s.strip().lower()
+    if v in ('1', 'true', 'yes', 'on'):
+        return True
+    if v in ('0', 'false', 'no', 'off', ''):
+        return False
+    raise ValueError(f"not a boolean: {s!r}")
+
+
+def _to_int(s: str) -> int:
+    return int(s.strip().replace('_', ''))
+
+
+def coerce(name: str, default, value):
+    """把 TOML 值或字符串转换成与默认值相同的类型。"""
+    try:
+        return _coerce(name, default, value)
+    except (TypeError, ValueError) as e:
+        raise ValueError(f"{name}: {e}") from None
+
+
+def _coerce(name: str, default, value):
+    if isinstance(default, bool):
+        return value if isinstance(value, bool) else _to_bool(str(value))
+    if isinstance(default, int):
+        return value if isinstance(value, int) and not isinstance(value, bool) else _to_int(str(value))
+    if isinstance(default, float):
+        return float(value)
+    if isinstance(default, str):
+        return str(value)
+    if isinstance(default, dict):
+        v = json.loads(value) if isinstance(value, str) else value
+        if not isinstance(v, dict):
+            raise ValueError(f"{name} expects a table/JSON object")
+        return v
+    if isinstance(default, _SEQS):
+        items = [x.strip() for x in value.split(',') if x.strip()] if isinstance(value, str) else list(value)
+        sample = next(iter(default), '')
+        if isinstance(sample, int) and not isinstance(sample, bool):
+            items = [x if isinstance(x, int) else _to_int(str(x)) for x in items]
+        return type(default)(items)
+    return value
+
+
+def _norm_table(table: dict, defaults: dict, where: str) -> dict:
+    out = {}
+    for k, v in table.items():
+        name = k.upper().replace('-', '_')
+        if name not in defaults:
+            raise ValueError(f"{where}: unknown option {k!r}")
+        out[name] = coerce(name, defaults[name], v)
+    return out
+
+
+def load_config(namespace: dict, profiles: Optional[dict] = None, argv=None,
+                parser: Optional[argparse.ArgumentParser] = None,
+                default_profile: Optional[str] = None):
+    """
+    解析配置并返回 (overrides, args)：
+      overrides: 只含被某一层显式设置过的项 {NAME: value}
+      args:      argparse 结果（调用方自己加的参数，如 master 的 --force）
+    """
+    defaults = collect_defaults(namespace)
+    profiles = dict(profiles or {})
+    parser = parser or argparse.ArgumentParser()
+
+    grp = parser.add_argument_group('config')
+    grp.add_argument('--config', default=os.environ.get(f'{ENV_PREFIX}CONFIG'),
+                     help='TOML 配置文件（[default] 与 [profiles.<name>] 段）')
+    grp.add_argument('--profile', default=os.environ.get(f'{ENV_PREFIX}PROFILE', default_profile),
+                     help=f"部署 profile（内置：{', '.join(profiles) or '无'}）")
+    grp.add_argument('--print-config', action='store_true', help='打印生效配置后退出（* 为被覆盖的项）')
+
+    opts = parser.add_argument_group('options')
+    for name, default in defaults.items():
+        flag = '--' + name.lower().replace('_', '-')
+        if isinstance(default, bool):
+            opts.add_argument(flag, dest=name, action=argparse.BooleanOptionalAction,
+                              default=argparse.SUPPRESS, help=f'默认 {default}')
+        else:
+            opts.add_argument(flag, dest=name, default=argparse.SUPPRESS, metavar=type(default).__name__.upper(),
+                              help=f'默认 {default!r}')
+
+    args = parser.parse_args(argv)
+
+    overrides: dict = {}
+    try:
+        file_profiles = {}
+        if args.config:
+            if tomllib is None:
+                raise ValueError("--config 需要 Python 3.11+（tomllib）或 pip install tomli")
+            with open(args.config, 'rb') as f:
+                doc = tomllib.load(f)
+            overrides.update(_norm_table(doc.get('default', {}), defaults, f"{args.config} [default]"))
+            file_profiles = doc.get('profiles', {})
+
+        if args.profile:
+            if args.profile not in profiles and args.profile not in file_profiles:
+                raise ValueError(f"unknown profile {args.profile!r}")
+            overrides.update(_norm_table(profiles.get(args.profile, {}), defaults, f"profile {args.profile}"))
+            overrides.update(_norm_table(file_profiles.get(args.profile, {}), defaults,
+                                         f"{args.config} [profiles.{args.profile}]"))
+
+        for name in PLAIN_ENV:
+            if name in defaults and name in os.environ:
+                overrides[name] = coerce(name, defaults[name], os.environ[name])
+        for name, default in defaults.items():
+            env = os.environ.get(ENV_PREFIX + name)
+            if env is not None:
+                overrides[name] = coerce(name, default, env)
+
+        for name, default in defaults.items():
+            if name in vars(args):
+                overrides[name] = coerce(name, default, getattr(args, name))
+    except (OSError, ValueError) as e:   # TOMLDecodeError 是 ValueError 子类
+        parser.error(str(e))
+
+    return overrides, args
+
+
+def print_config(namespace: dict, overrides: dict):
+    """打印生效配置（在调用方应用 overrides、算完派生项之后调用）。"""
+    for name, value in collect_defaults(namespace).items():
+        mark = '*' if name in overrides else ' '
+        print(f"{mark} {name} = {value!r}")
@@ -0,0 +1,183 @@
+#!/usr/bin/env python3
+"""
+响应内容判定（替代原先对整个 body 两次 `in` 扫描 + 按 resp.charset 解码）：
+
+  - 伪 404：只看前 sniff_bytes 字节 —— 其中的 '404 Not Found'，或 <title> 像“404 / 页面不存在”
+  - 编码：BOM > HTTP 头 charset > 前缀里的 <meta charset> / http-equiv；都没有时先按 UTF-8 严格解码，
+    失败再用 charset_normalizer 检测前缀（已安装时），最后用 fallback（默认 gb18030）。
+    别名按 WHATWG 习惯放宽：gb2312/gbk -> gb18030，big5 -> big5hkscs，iso-8859-1/ascii -> cp1252
+  - LIGHT_MODE 只记长度，不解码正文
+
+可选的按 host 伪 404 指纹（Soft404Prober）：每个 origin 请求一次随机不存在的路径，
+返回 2xx/3xx 时记下其 <title> 与长度；之后该 host 标题相同、长度相近的页面判为伪 404（根路径除外）。
+"""
+import asyncio
+import codecs
+import re
+import secrets
+import time
+from collections import OrderedDict
+from typing import Optional, Tuple
+from urllib.parse import urlsplit
+
+try:
+    from charset_normalizer import from_bytes as _detect
+except ImportError:
+    _detect = None
+
+DETECT_BYTES = 32 * 1024
+
+_META_CHARSET = re.compile(rb'<meta\s[^>]*?charset\s*=\s*["\']?\s*([\w.:-]+)', re.I)
+_TITLE = re.compile(rb'<title[^>]*>(.*?)</title', re.I | re.S)
+_SOFT404_TITLE = re.compile(
+    r'^\s*404\b|\b404\s*(?:-|:|\|)?\s*(?:not\s+found|error|错误|頁面|页面)|page\s+not\s+found|^\s*not\s+found'
+    r'|页面不存在|页面未找到|找不到(?:该|此)?页面|頁面不存在|找不到網頁',
+    re.I,
+)
+_BOMS = ((codecs.BOM_UTF8, 'utf-8-sig'), (codecs.BOM_UTF16_LE, 'utf-16'), (codecs.BOM_UTF16_BE, 'utf-16'))
+# codecs.lookup() 规范名 -> 实际使用的解码器
+_WIDEN = {'gb2312': 'gb18030', 'gbk': 'gb18030', 'big5': 'big5hkscs', 'iso8859-1': 'cp1252', 'ascii': 'cp1252'}
+_PRE = {'x-gbk': 'gbk', 'x-big5': 'big5', 'unicode': 'utf-8'}
+
+
+def normalize_charset(name) -> Optional[str]:
+    if not name:
+        return None
+    if isinstance(name, bytes):
+        name = name.decode('ascii', 'ignore')
+    name = name.strip().strip('"\'').lower()
+    try:
+        canonical = codecs.lookup(_PRE.get(name, name)).name
+    except LookupError:
+        return None
+    return _WIDEN.get(canonical, canonical)
+
+
+class ContentClassifier:
+    def __init__(self, *, sniff_bytes: int = 8192, fallback: str = 'gb18030', light: bool = False):
+        self.sniff_bytes = sniff_bytes
+        self.fallback = normalize_charset(fallback) or 'utf-8'
+        self.light = light
+        self.counters = {
+            'soft404': 0, 'soft404_fp': 0, 'probes': 0,
+            'bom': 0, 'header': 0, 'meta': 0, 'utf8': 0, 'detect': 0, 'fallback': 0,
+        }
+
+    def declared(self, head: bytes, header_charset: Optional[str]) -> Tuple[Optional[str], str]:
+        for bom, enc in _BOMS:
+            if head.startswith(bom):
+                return enc, 'bom'
+        enc = normalize_charset(header_charset)
+        if enc:
+            return enc, 'header'
+        m = _META_CHARSET.search(head)
+        if m:
+            enc = normalize_charset(m.group(1))
+            if enc:
+                # 能读到 ASCII 的 <meta> 就不可能是 UTF-16
+                return ('utf-8' if enc.startswith('utf-16') else enc), 'meta'
+        return None, ''
+
+    def title(self, head: bytes, enc: Optional[str]) -> Optional[str]:
+        m = _TITLE.search(head)
+        if m is None:
+            return None
+        try:
+            text = m.group(1).decode(enc or 'utf-8', 'replace')
+        except LookupError:
+            text = m.group(1).decode('utf-8', 'replace')
+        return ' '.join(text.split())[:200]
+
+    def decode(self, raw: bytes, enc: Optional[str], source: str) -> str:
+        if enc:
+            self.counters[source] += 1
+            return raw.decode(enc, 'ignore')
+        try:
+            html = raw.decode('utf-8')
+            self.counters['utf8'] += 1
+            return html
+        except UnicodeDecodeError:
+            pass
+        if _detect is not None:
+            best = _detect(raw[:DETECT_BYTES]).best()
+            guess = normalize_charset(best.encoding) if best is not None else None
+            if guess:
+                self.counters['detect'] += 1
+                return raw.decode(guess, 'ignore')
+        self.counters['fallback'] += 1
+        return raw.decode(self.fallback, 'ignore')
+
+    def classify(self, status: int, raw: bytes, header_charset: Optional[str]):
+        """返回 (ok, status, payload, title)；payload 契约与旧 _classify 相同，title 供指纹比较。"""
+        head = raw[:self.sniff_bytes]
+        enc, source = self.declared(head, header_charset)
+        title = self.title(head, enc)
+        if status >= 400:
+            return False, status, '', title
+        if b'404 Not Found' in head or (title and _SOFT404_TITLE.search(title)):
+            self.counters['soft404'] += 1
+            return False, status, '', title
+        if self.light:
+            return True, status, {'html_len': len(raw)}, title
+        return True, status, self.decode(raw, enc, source), title
+
+
+class Soft404Prober:
+    def __init__(self, fetch, content: ContentClassifier, *, max_hosts: int = 50_000,
+                 ttl: float = 6 * 3600, tolerance: float = 0.1):
+        """fetch: async (url) -> (status or None, raw bytes, header charset)"""
+        self.fetch = fetch
+        self.content = content
+        self.max_hosts = max_hosts
+        self.ttl = ttl
+        self.tolerance = tolerance
+        self._cache: OrderedDict = OrderedDict()   # origin -> (expires, (title, length) or None)
+        self._inflight: dict = {}
+
+    async def is_soft404(self, url: str, title: Optional[str], length: int) -> bool:
+        u = urlsplit(url)
+        if u.path in ('', '/') and not u.query:
+            return False
+        fp = await self._fingerprint(f"{u.scheme}://{u.netloc}".lower())
+        if fp is None or not fp[0] or fp[0] != title:
+            return False
+        if abs(length - fp[1]) <= max(512, fp[1] * self.tolerance):
+            self.content.counters['soft404_fp'] += 1
+            return True
+        return False
+
+    async def _fingerprint(self, origin: str):
+        hit = self._cache.get(origin)
+        if hit is not None and hit[0] > time.monotonic():
+            self._cache.move_to_end(origin)
+            return hit[1]
+        fut = self._inflight.get(origin)
+        if fut is not None:
+            return await asyncio.shield(fut)
+        fut = asyncio.get_running_loop().create_future()
+        self._inflight[origin] = fut
+        fp = None
+        try:
+            self.content.counters['probes'] += 1
+            status, raw, charset = await self.fetch(f"{origin}/{secrets.token_hex(8)}-{secrets.token_hex(4)}.html")
+            if status is not None and status < 400:
+                head = raw[:self.content.sniff_bytes]
+                enc, _ = self.content.declared(head, charset)
+                fp = (self.content.title(head, enc), len(raw))
+        except Exception:
+            fp = None
+        finally:
+            self._cache[origin] = (time.monotonic() + self.ttl, fp)
+            self._cache.move_to_end(origin)
+            while len(self._cache) > self.max_hosts:
+                self._cache.popitem(last=False)
+            fut.set_result(fp)
+            self._inflight.pop(origin, None)
+        return fp
+
+
+def content_summary(counters: dict) -> str:
+    c = counters
+    return (f"内容: 伪404={c['soft404'] + c['soft404_fp']:,}(指纹={c['soft404_fp']:,}, 探测={c['probes']:,}) "
+            f"编码 header={c['header']:,} meta={c['meta']:,} bom={c['bom']:,} utf8={c['utf8']:,} "
+            f"检测={c['detect']:,} 兜底={c['fallback']:,}")
@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+SIGTERM / SIGINT 收尾（滚动重启从机时不丢任务）：
+
+  1. 第一次信号：置 event。worker 不再弹出新批次；批内尚未开始的条目交给 hold()，
+     正在抓的请求照常完成（成功写库、失败按原逻辑重试），最多等 timeout 秒
+  2. 超时或第二次信号：取消仍在抓取的协程，被中断的条目连同批内剩余条目一起 hold()（尝试数不变）；
+     本批待停放的条目交给 hold_parked()，已发现待入队的链接交给 hold_links()
+  3. requeue()：所有 job 的暂存条目在一个 pipeline 里 RPUSH 回各自队列的右端（即下一批被弹出），
+     停放条目在同一个 pipeline 里 ZADD 到 <队列>:parked，再把暂存的链接入队，
+     之后才归还这些条目的租约 —— 期间它们一直算在本进程名下，其它从机不会误判完成
+  4. 之后照常：通知写库协程 flush、打印汇总
+
+Windows 等不支持 loop.add_signal_handler 的平台保持默认行为（Ctrl-C 直接中断）。
+"""
+import asyncio
+import signal
+
+RPUSH_CHUNK = 10_000
+
+
+class Drain:
+    def __init__(self, timeout: float = 20.0):
+        self.timeout = timeout
+        self.event = asyncio.Event()
+        self.held: dict = {}         # Lane -> [entry bytes]，按原弹出顺序
+        self.parked: dict = {}       # Lane -> {entry bytes: 到期时间戳}
+        self.links: list = []        # [(frontier, Lane, found, crawled)]
+        self.signals = 0
+        self.requeued = 0
+        self._workers: list = []
+        self._installed: list = []
+
+    def install(self, loop: asyncio.AbstractEventLoop, workers: list):
+        self._workers = workers
+        for sig in (signal.SIGTERM, signal.SIGINT):
+            try:
+                loop.add_signal_handler(sig, self._on_signal, sig.name)
+                self._installed.append(sig)
+            except (NotImplementedError, RuntimeError, ValueError):
+                pass
+
+    def uninstall(self, loop: asyncio.AbstractEventLoop):
+        for sig in self._installed:
+            loop.remove_signal_handler(sig)
+        self._installed = []
+
+    def _on_signal(self, name: str):
+        self.signals += 1
+        if self.signals == 1:
+            print(f"DRAIN: 收到 {name}，停止弹出；未开始的条目回推队列，在途抓取最多等 {self.timeout}s（再次发送立即取消）")
+            self.event.set()
+        else:
+            print(f"DRAIN: 再次收到 {name}，立即取消在途抓取")
+            for t in self._workers:
+                t.cancel()
+
+    def hold(self, lane, entries: list) -> int:
+        if entries:
+            self.held.setdefault(lane, []).extend(entries)
+        return len(entries)
+
+    def hold_parked(self, lane, parked: dict):
+        if parked:
+            self.parked.setdefault(lane, {}).update(parked)
+
+    def hold_links(self, frontier, lane, found: list, crawled: list):
+        if crawled:
+            self.links.append((frontier, lane, found, crawled))
+
+    async def wait_workers(self):
+        pending = [t for t in self._workers if not t.done()]
+        if pending:
+            _, pending = await asyncio.wait(pending, timeout=self.timeout)
+        if pending:
+            print(f"DRAIN: {len(pending)} 个协程 {self.timeout}s 内未完成，取消并回推其条目")
+            for t in pending:
+                t.cancel()
+            await asyncio.gather(*pending, return_exceptions=True)
+
+    async def requeue(self, redis_conn) -> int:
+        """返回回推到队列的条目数（停放条目与链接不计）。"""
+        held, self.held = self.held, {}
+        parked, self.parked = self.parked, {}
+        links, self.links = self.links, []
+        if held or parked:
+            async with redis_conn.pipeline(transaction=True) as pipe:
+                for lane, entries in held.items():
+                    # 右端是下一个被弹出的位置：倒序推入，保持原来的弹出顺序
+                    entries = entries[::-1]
+                    for i in range(0, len(entries), RPUSH_CHUNK):
+                        pipe.rpush(lane.key, *entries[i:i + RPUSH_CHUNK])
+                for lane, entries in parked.items():
+                    pipe.zadd(f'{lane.key}:parked', entries)
+                await pipe.execute()
+        # 链接入队脚本按 seen 集合去重，被取消前已部分入队的再推一次也不会重复
+        for frontier, lane, found, crawled in links:
+            await frontier.push(lane.key, found, crawled)
+        for lane, entries in held.items():
+            await lane.coord.released(len(entries))
+        n = sum(len(e) for e in held.values())
+        self.requeued += n
+        return n
@@ -0,0 +1,281 @@
+#!/usr/bin/env python3
+"""
+出口池：同一从机经多个出口（本机源地址 / HTTP 代理 / SOCKS 代理）抓取，分摊单 IP 的限流与封禁。
+
+出口写法（EGRESS 列表，每项一个）：
+  'local:10.0.0.2'              绑定本机源地址（TCPConnector local_addr）
+  'http://user:pw@10.0.0.9:3128' HTTP 代理（逐请求 proxy=）
+  'socks5://10.0.0.9:1080'      SOCKS4/5 代理（需要 aiohttp_socks）
+  'direct'                      本机默认地址（复用 worker 原有的 ClientSession）
+
+每个出口一个 ClientSession（各自的连接池，LIMIT_PER_HOST 按出口计）。选择出口：
+  - 默认：按 host 计账 —— 该出口对该 host 的下一个可用时刻（host_rate > 0 时按速率排队）、
+    在途数、出口总在途数、健康分，依次取最小 / 最好的
+  - sticky：按 host 做 rendezvous 哈希固定到一个出口；出口退役或对该 host 被封时只迁移受影响的 host
+  - 某出口收到 ban_status（默认 403/407/429）后 host_ban 秒内该 host 不再走它（其它出口都被封时仍可用）；
+    触发的这个请求当场换一个对该 host 可用、且本次还没试过的出口重试，最多 ban_retries 次
+    （403 等本不重试的状态码也因此不会让这个 URL 直接成为最终失败）
+  - host 一律取 URL 的 hostname（小写、不含端口），页面请求与 robots.txt / 伪 404 探测共用同一份计账
+
+健康分：EWMA(拿到非 ban_status 的 HTTP 响应 = 1，否则 0)。至少 min_samples 个样本后，
+低于全池最好出口的 retire_score 倍即退役 retire_cooldown 秒，之后以满分回池，再次退役冷却翻倍。
+按相对值判断：目标站整体宕机 / 全部 403 时各出口一起变差，不会误退役；至少保留一个出口。
+"""
+import asyncio
+import hashlib
+import time
+from typing import Optional
+from urllib.parse import urlsplit
+
+import aiohttp
+
+try:
+    from aiohttp_socks import ProxyConnector
+except ImportError:
+    ProxyConnector = None
+
+EWMA_ALPHA = 0.05
+MAX_COOLDOWN = 3600.0
+
+ACTIVE = 'active'
+RETIRED = 'retired'
+
+
+class _HostSlot:
+    __slots__ = ('next_at', 'in_flight', 'ban_until')
+
+    def __init__(self):
+        self.next_at = 0.0
+        self.in_flight = 0
+        self.ban_until = 0.0
+
+
+class Egress:
+    """一个出口；get() 与 ClientSession.get() 同签名，可直接传给 fetch_once / fetch_robots。"""
+
+    def __init__(self, spec: str):
+        self.spec = spec
+        self.kind, self.proxy, self.local_addr, self.name = parse_egress(spec)
+        self.session: Optional[aiohttp.ClientSession] = None
+        self.owned = False           # session 由出口池创建（关闭时一并关闭）
+        self.state = ACTIVE
+        self.score = 1.0
+        self.samples = 0
+        self.in_flight = 0
+        self.retire_until = 0.0
+        self.cooldown = 0.0
+        self.hosts: dict = {}        # host -> _HostSlot
+        self.counters = {'requests': 0, 'ok': 0, 'bans': 0, 'errors': 0, 'seconds': 0.0,
+                         'score': 1.0, 'state': ACTIVE, 'retired': 0}
+
+    def get(self, url: str, **kw):
+        if self.proxy is not None:
+            kw['proxy'] = self.proxy
+        return self.session.get(url, **kw)
+
+    def connector(self, **kw):
+        if self.kind == 'socks':
+            if ProxyConnector is None:
+                raise RuntimeError(f"出口 {self.spec} 需要 aiohttp_socks（pip install aiohttp_socks）")
+            return ProxyConnector.from_url(self.spec, **kw)
+        if self.local_addr is not None:
+            kw['local_addr'] = (self.local_addr, 0)
+        return aiohttp.TCPConnector(**kw)
+
+
+def parse_egress(spec: str):
+    """返回 (kind, proxy url or None, local addr or None, 显示名)；kind 为 direct / local / http / socks。"""
+    s = spec.strip()
+    if s.lower() == 'direct':
+        return 'direct', None, None, 'direct'
+    if s.lower().startswith('local:'):
+        addr = s[6:].strip().strip('[]')
+        if not addr:
+            raise ValueError(f"egress {spec!r}: missing local address")
+        return 'local', None, addr, addr
+    u = urlsplit(s)
+    scheme = u.scheme.lower()
+    if not u.hostname:
+        raise ValueError(f"egress {spec!r}: expected direct, local:<ip> or <scheme>://host:port")
+    name = f"{u.hostname}:{u.port}" if u.port else u.hostname
+    if scheme in ('http', 'https'):
+        return 'http', s, None, name
+    if scheme in ('socks4', 'socks4a', 'socks5', 'socks5h'):
+        return 'socks', None, None, name
+    raise ValueError(f"egress {spec!r}: unsupported scheme {u.scheme!r}")
+
+
+def host_key(url: str) -> str:
+    return urlsplit(url).hostname or ''
+
+
+def _rank(host: str, name: str) -> bytes:
+    return hashlib.blake2b(f"{host}\0{name}".encode(), digest_size=8).digest()
+
+
+class EgressPool:
+    def __init__(self, specs: list, *, sticky: bool = False, host_rate: float = 0.0,
+                 ban_status=frozenset({403, 407, 429}), host_ban: float = 60.0,
+                 retire_score: float = 0.5, min_samples: int = 50, retire_cooldown: float = 300.0,
+                 ban_retries: int = 1, max_hosts: int = 100_000):
+        self.egresses = [Egress(s) for s in specs]
+        seen: dict = {}
+        for e in self.egresses:
+            n = seen[e.name] = seen.get(e.name, 0) + 1
+            if n > 1:
+                e.name = f"{e.name}#{n}"
+        self.sticky = sticky
+        self.interval = 1.0 / host_rate if host_rate > 0 else 0.0
+        self.ban_status = frozenset(ban_status)
+        self.host_ban = host_ban
+        self.retire_score = retire_score
+        self.min_samples = max(1, min_samples)
+        self.retire_cooldown = retire_cooldown
+        self.ban_retries = max(0, ban_retries)
+        self.max_hosts = max_hosts
+        self.counters = {'since': time.monotonic(), 'ban_retries': 0,
+                         'egresses': {e.name: e.counters for e in self.egresses}}
+
+    # ---------- 会话 ----------
+    def open(self, make_session, default_session: aiohttp.ClientSession):
+        """make_session(egress) -> 该出口的 ClientSession（用 egress.connector() 建连接器）；'direct' 复用 default_session。"""
+        for e in self.egresses:
+            if e.kind == 'direct':
+                e.session = default_session
+            else:
+                e.session = make_session(e)
+                e.owned = True
+
+    async def aclose(self):
+        for e in self.egresses:
+            if e.owned and e.session is not None:
+                await e.session.close()
+
+    # ---------- 选择 ----------
+    def _active(self, now: float) -> list:
+        out = []
+        for e in self.egresses:
+            if e.state == RETIRED and now >= e.retire_until:
+                e.state = e.counters['state'] = ACTIVE
+                e.score = e.counters['score'] = 1.0
+                e.samples = 0
+            if e.state == ACTIVE:
+                out.append(e)
+        return out or self.egresses
+
+    def pick(self, host: str, tried: tuple = ()) -> Optional[Egress]:
+        """tried 非空时只在未试过、且未对该 host 被封的出口里选，没有则返回 None。"""
+        now = time.monotonic()
+        active = self._active(now)
+        usable = [e for e in active
+                  if e not in tried and not (host in e.hosts and e.hosts[host].ban_until > now)]
+        if not usable:
+            if tried:
+                return None
+            usable = active
+        if len(usable) == 1:
+            return usable[0]
+        if self.sticky:
+            return max(usable, key=lambda e: _rank(host, e.name))
+
+        def load(e: Egress):
+            slot = e.hosts.get(host)
+            if slot is None:
+                return 0.0, 0, e.in_flight, -e.score
+            return max(slot.next_at, now), slot.in_flight, e.in_flight, -e.score
+        return min(usable, key=load)
+
+    def session_for(self, url: str) -> Egress:
+        """robots.txt / 伪 404 探测等旁路请求：只选出口，不计账。"""
+        return self.pick(host_key(url))
+
+    def _slot(self, e: Egress, host: str) -> _HostSlot:
+        slot = e.hosts.get(host)
+        if slot is None:
+            slot = e.hosts[host] = _HostSlot()
+            if len(e.hosts) > self.max_hosts:
+                now = time.monotonic()
+                e.hosts = {h: s for h, s in e.hosts.items()
+                           if s.in_flight or s.next_at > now or s.ban_until > now or h == host}
+        return slot
+
+    # ---------- 抓取 ----------
+    async def fetch(self, url: str, call):
+        """call(egress) -> fetch_once 的 (ok, status, payload)；按出口 / host 计账与限速，被封时换出口重试。"""
+        host = host_key(url)
+        tried = []
+        e = self.pick(host)
+        while True:
+            res = await self._fetch_via(e, host, call)
+            if res[1] not in self.ban_status or len(tried) >= self.ban_retries:
+                return res
+            tried.append(e)
+            e = self.pick(host, tuple(tried))
+            if e is None:
+                return res
+            self.counters['ban_retries'] += 1
+
+    async def _fetch_via(self, e: Egress, host: str, call):
+        slot = self._slot(e, host)
+        if self.interval:
+            now = time.monotonic()
+            at = max(now, slot.next_at)
+            slot.next_at = at + self.interval
+            if at > now:
+                await asyncio.sleep(at - now)
+        slot.in_flight += 1
+        e.in_flight += 1
+        t0 = time.perf_counter()
+        try:
+            res = await call(e)
+        finally:
+            slot.in_flight -= 1
+            e.in_flight -= 1
+        self._record(e, slot, res[1], time.perf_counter() - t0)
+        return res
+
+    def _record(self, e: Egress, slot: _HostSlot, status, seconds: float):
+        c = e.counters
+        c['requests'] += 1
+        c['seconds'] += seconds
+        good = status is not None and status not in self.ban_status
+        if good:
+            c['ok'] += 1
+        elif status is None:
+            c['errors'] += 1
+        else:
+            c['bans'] += 1
+            slot.ban_until = time.monotonic() + self.host_ban
+        e.score += EWMA_ALPHA * ((1.0 if good else 0.0) - e.score)
+        e.samples += 1
+        c['score'] = e.score
+        if not good and e.state == ACTIVE and e.samples >= self.min_samples:
+            self._maybe_retire(e)
+
+    def _maybe_retire(self, e: Egress):
+        peers = [p for p in self.egresses if p.state == ACTIVE and p is not e]
+        if not peers:
+            return
+        best = max(max(p.score for p in peers), e.score)
+        if e.score >= best * self.retire_score:
+            return
+        e.cooldown = min(e.cooldown * 2, MAX_COOLDOWN) if e.cooldown else self.retire_cooldown
+        e.retire_until = time.monotonic() + e.cooldown
+        e.state = e.counters['state'] = RETIRED
+        e.counters['retired'] += 1
+        print(f"EGRESS: 退役 {e.name}（健康={e.score:.2f}，最好={best:.2f}），{e.cooldown:.0f}s 后回池")
+
+
+def egress_summary(counters: dict) -> str:
+    elapsed = max(time.monotonic() - counters['since'], 1e-9)
+    parts = []
+    for name, c in counters['egresses'].items():
+        n = c['requests']
+        if c['state'] == RETIRED:
+            parts.append(f"{name}=退役(x{c['retired']}, {n:,})")
+        elif n:
+            parts.append(f"{name}={n:,}({n / elapsed:.1f}/s, 成功={c['ok'] / n:.1%}, 封={c['bans'] / n:.1%}, "
+                         f"健康={c['score']:.2f}, 平均={c['seconds'] / n * 1000:.0f}ms)")
+        else:
+            parts.append(f"{name}=0")
+    return f"出口: 换出口重试={counters['ban_retries']:,}, " + ", ".join(parts)
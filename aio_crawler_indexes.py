@@ -0,0 +1,45 @@
+#!/usr/bin/env python3
+"""
+结果库索引（pages / failed_tasks），worker 首次写入某个库时建立，requeue 工具也可单独执行。
+
+  pages         url(hashed)：按 URL 点查；host：按站点统计 / 导出；blob(sparse)：查引用某份正文的页面
+  failed_tasks  task_id(unique)：同一 RUN_ID 重跑时失败记录不再重复（重复插入按 BulkWriteError 计数跳过）
+                url(hashed)、host、(status, host)：requeue 按状态 / 站点筛选走索引，不再全表扫描
+                requeued_at(TTL)：只对已被重新入队的失败记录生效，到期自动清理；未处理的记录不受影响
+
+create_index 是幂等的；单个索引失败（例如旧数据里已有重复 task_id）只告警，不影响其它索引和写入。
+"""
+from pymongo import ASCENDING, HASHED, IndexModel
+from pymongo.errors import OperationFailure
+
+
+def index_models(requeued_ttl_days: float = 0) -> dict:
+    failed = [
+        IndexModel([('task_id', ASCENDING)], unique=True, name='task_id_unique'),
+        IndexModel([('url', HASHED)], name='url_hashed'),
+        IndexModel([('host', ASCENDING)], name='host'),
+        IndexModel([('status', ASCENDING), ('host', ASCENDING)], name='status_host'),
+    ]
+    if requeued_ttl_days:
+        failed.append(IndexModel([('requeued_at', ASCENDING)], name='requeued_ttl',
+                                 expireAfterSeconds=int(requeued_ttl_days * 86400)))
+    return {
+        'pages': [
+            IndexModel([('url', HASHED)], name='url_hashed'),
+            IndexModel([('host', ASCENDING)], name='host'),
+            IndexModel([('blob', ASCENDING)], name='blob', sparse=True),
+        ],
+        'failed_tasks': failed,
+    }
+
+
+async def ensure_indexes(db, requeued_ttl_days: float = 0) -> list:
+    """db 为 motor 的 AsyncIOMotorDatabase；返回告警列表（空表示全部就绪）。"""
+    warnings = []
+    for coll, models in index_models(requeued_ttl_days).items():
+        for m in models:
+            try:
+                await db[coll].create_indexes([m])
+            except OperationFailure as e:
+                warnings.append(f"{db.name}.{coll}.{m.document['name']}: {e}")
+    return warnings
@@ -0,0 +1,343 @@
+#!/usr/bin/env python3
+"""
+master 的流式输入层：边解压边解析，不落地解压副本。
+
+  压缩：.gz / .bz2 / .xz（标准库）、.zst（可选 pip install zstandard），按扩展名识别
+  格式：csv / tsv / jsonl（.jsonl/.ndjson/.json）/ parquet（可选 pip install pyarrow）/ stdin（路径 '-'）
+  列选择：url_column / id_column 为列名或从 0 开始的列号；url_column 为空时沿用旧规则
+         （csv 单列取第 0 列，否则第 1 列；jsonl 取 'url' 字段）
+
+每条记录附带“读到这里为止”的位置，供断点续推：
+  csv/tsv/jsonl 为解压后流的字节偏移（gzip 等由解压器向前 seek；.zst 流不能 seek，
+  续推时读出并丢弃前 offset 个字节），parquet 为行号。
+
+多文件时 parallel_chunks() 用多个子进程并行解析，按 chunk 回传给主进程，
+主进程仍然走原来的 host 交错 + 批量 LPUSH 流程。
+"""
+import bz2
+import csv
+import gzip
+import io
+import json
+import lzma
+import multiprocessing as mp
+import os
+import queue
+import sys
+from collections import namedtuple
+from typing import Iterator, Optional
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+try:
+    import pyarrow.parquet as pq
+except ImportError:
+    pq = None
+
+COMPRESSIONS = {'.gz': 'gzip', '.gzip': 'gzip', '.bz2': 'bz2', '.xz': 'xz', '.zst': 'zstd', '.zstd': 'zstd'}
+FORMATS = {
+    '.csv': 'csv', '.txt': 'csv', '.tsv': 'tsv',
+    '.jsonl': 'jsonl', '.ndjson': 'jsonl', '.json': 'jsonl',
+    '.parquet': 'parquet', '.pq': 'parquet',
+}
+
+# 一个 chunk：同一输入文件的连续若干条；offset / row 为最后一条之后的位置；
+# last=True 表示该文件已读完（最后一个 chunk 可能为空，只用来带回文件末尾位置）；
+# skipped 为自上一个 chunk 以来跳过的格式错误行数（非法 JSON / id 不是整数等）
+Chunk = namedtuple('Chunk', 'path urls ids offset row last skipped', defaults=(0,))
+
+# 子进程多久没有任何回报就检查一次它们是否还活着（秒）
+READER_POLL = 1.0
+
+# 不能 seek 的流续推时每次读出丢弃的字节数
+SKIP_CHUNK = 1 << 20
+
+
+class Source:
+    def __init__(self, path: str, fmt: str = '', url_column: str = '', id_column: str = '',
+                 header: bool = True):
+        self.path = path
+        base = path.lower()
+        ext = os.path.splitext(base)[1]
+        self.compression = COMPRESSIONS.get(ext, '')
+        if self.compression:
+            base = base[:-len(ext)]
+        self.fmt = fmt or FORMATS.get(os.path.splitext(base)[1], 'csv')
+        if self.fmt not in ('csv', 'tsv', 'jsonl', 'parquet'):
+            raise ValueError(f"{path}: unsupported input format {self.fmt!r}")
+        if self.fmt == 'parquet' and self.compression:
+            raise ValueError(f"{path}: parquet 自带列压缩，不支持外层 {self.compression}")
+        self.url_column = url_column
+        self.id_column = id_column
+        self.header = header
+
+    @property
+    def resumable(self) -> bool:
+        return self.path != '-'
+
+    def identity(self) -> dict:
+        if self.path == '-':
+            return {'file': '-'}
+        st = os.stat(self.path)
+        return {'file': os.path.abspath(self.path), 'size': st.st_size, 'mtime': st.st_mtime}
+
+
+def open_binary(src: Source):
+    """返回解压后的二进制流（支持按行迭代；定位到续推位置用 skip_to()）。"""
+    if src.path == '-':
+        return sys.stdin.buffer
+    if src.compression == 'gzip':
+        return gzip.open(src.path, 'rb')
+    if src.compression == 'bz2':
+        return bz2.open(src.path, 'rb')
+    if src.compression == 'xz':
+        return lzma.open(src.path, 'rb')
+    if src.compression == 'zstd':
+        if zstandard is None:
+            raise RuntimeError(f"{src.path}: 读取 .zst 需要 pip install zstandard")
+        raw = open(src.path, 'rb')
+        return io.BufferedReader(zstandard.ZstdDecompressor().stream_reader(raw, closefd=True))
+    return open(src.path, 'rb')
+
+
+def skip_to(f, offset: int):
+    """把流定位到解压后的 offset：能 seek 的直接 seek，否则（.zst 流）分块读出丢弃。"""
+    try:
+        if f.seekable():
+            f.seek(offset)
+            return
+    except (AttributeError, OSError):
+        pass
+    left = offset
+    while left > 0:
+        n = len(f.read(min(left, SKIP_CHUNK)))
+        if n == 0:
+            raise ValueError(f"续推位置 {offset} 超出输入长度 {offset - left}")
+        left -= n
+
+
+def _column_index(spec: str, header: Optional[list]) -> Optional[int]:
+    if spec == '':
+        return None
+    if spec.lstrip('-').isdigit():
+        return int(spec)
+    if header is None or spec not in header:
+        raise ValueError(f"column {spec!r} not found in header {header!r}")
+    return header.index(spec)
+
+
+def _line_rows(f, start_offset: int, parse) -> Iterator[tuple]:
+    """
+    逐行读取，交给 parse(lines) 产出记录；parse 只按需取行（csv.reader 即如此），
+    所以每产出一条记录时累计的字节数就是下一条的精确起点（含跨行的引号字段）。
+    产出: (record, end_offset)
+    """
+    pos = start_offset
+
+    def lines():
+        nonlocal pos
+        for raw in f:
+            pos += len(raw)
+            yield raw.decode('utf-8')
+
+    for rec in parse(lines()):
+        yield rec, pos
+
+
+def iter_csv_rows(f, start_offset: int, delimiter: str = ','):
+    """产出: (row, end_offset)"""
+    return _line_rows(f, start_offset, lambda lines: csv.reader(lines, delimiter=delimiter))
+
+
+def iter_records(src: Source, start_offset: int = 0, start_row: int = 0,
+                 counts: Optional[dict] = None) -> Iterator[tuple]:
+    """
+    产出: (url, row_id or None, end_offset, end_row)；缺 URL 的行跳过。
+    start_offset / start_row 来自检查点（首次为 0）。
+    格式错误的行（非法 JSON、id 不是整数、列不够等）跳过，计入 counts['skipped']（若提供）。
+    """
+    if counts is None:
+        counts = {}
+    counts.setdefault('skipped', 0)
+    if src.fmt == 'parquet':
+        yield from _iter_parquet(src, start_row, counts)
+        return
+
+    f = open_binary(src)
+    try:
+        if start_offset:
+            skip_to(f, start_offset)
+        row_no = start_row
+
+        if src.fmt == 'jsonl':
+            url_key = src.url_column or 'url'
+            id_key = src.id_column or None
+            for line, end in _line_rows(f, start_offset, lambda lines: lines):
+                row_no += 1
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    obj = json.loads(line)
+                    if isinstance(obj, list):
+                        url = obj[int(url_key)] if url_key.isdigit() else None
+                        rid = obj[int(id_key)] if id_key and id_key.isdigit() else None
+                    elif isinstance(obj, dict):
+                        url = obj.get(url_key)
+                        rid = obj.get(id_key) if id_key else None
+                    else:
+                        raise ValueError('not an object or array')
+                    rid = int(rid) if rid is not None else None
+                except (IndexError, ValueError, TypeError):
+                    counts['skipped'] += 1
+                    continue
+                if url:
+                    yield url, rid, end, row_no
+            return
+
+        rows = iter_csv_rows(f, start_offset, '\t' if src.fmt == 'tsv' else ',')
+        header = None
+        if src.header:
+            if start_offset == 0:
+                first = next(rows, None)
+                header = first[0] if first else None
+            elif (src.url_column and not src.url_column.isdigit()) or \
+                    (src.id_column and not src.id_column.isdigit()):
+                # 续推时按列名取列，需要重新读表头
+                with open_binary(src) as hf:
+                    header = next(iter_csv_rows(hf, 0, '\t' if src.fmt == 'tsv' else ','), (None,))[0]
+        url_i = _column_index(src.url_column, header)
+        id_i = _column_index(src.id_column, header)
+
+        for row, end in rows:
+            row_no += 1
+            try:
+                if url_i is None:
+                    url = row[0] if len(row) == 1 else row[1]
+                else:
+                    url = row[url_i]
+                rid = int(row[id_i]) if id_i is not None else None
+            except (IndexError, ValueError):
+                counts['skipped'] += 1
+                continue
+            if url:
+                yield url, rid, end, row_no
+    finally:
+        if f is not sys.stdin.buffer:
+            f.close()
+
+
+def _iter_parquet(src: Source, start_row: int, counts: dict):
+    if pq is None:
+        raise RuntimeError(f"{src.path}: 读取 parquet 需要 pip install pyarrow")
+    pf = pq.ParquetFile(src.path)
+    names = pf.schema_arrow.names
+    url_col = src.url_column or 'url'
+    url_col = names[int(url_col)] if url_col.isdigit() else url_col
+    id_col = names[int(src.id_column)] if src.id_column.isdigit() else (src.id_column or None)
+    cols = [url_col] + ([id_col] if id_col else [])
+
+    row_no = 0
+    for batch in pf.iter_batches(batch_size=65_536, columns=cols):
+        n = batch.num_rows
+        if row_no + n <= start_row:
+            row_no += n
+            continue
+        urls = batch.column(0).to_pylist()
+        ids = batch.column(1).to_pylist() if id_col else None
+        for i in range(max(0, start_row - row_no), n):
+            url = urls[i]
+            try:
+                rid = int(ids[i]) if ids and ids[i] is not None else None
+            except (TypeError, ValueError):
+                counts['skipped'] += 1
+                continue
+            if url:
+                yield url, rid, row_no + i + 1, row_no + i + 1
+        row_no += n
+
+
+def iter_chunks(src: Source, chunk_size: int, start_offset: int = 0, start_row: int = 0) -> Iterator[Chunk]:
+    urls, ids = [], []
+    has_ids = bool(src.id_column)
+    offset, row = start_offset, start_row
+    counts = {'skipped': 0}
+    reported = 0
+    for url, rid, offset, row in iter_records(src, start_offset, start_row, counts):
+        urls.append(url)
+        if has_ids:
+            ids.append(rid)
+        if len(urls) >= chunk_size:
+            yield Chunk(src.path, urls, ids if has_ids else None, offset, row, False, counts['skipped'] - reported)
+            reported = counts['skipped']
+            urls, ids = [], []
+    yield Chunk(src.path, urls, ids if has_ids else None, offset, row, True, counts['skipped'] - reported)
+
+
+# ---------- 多文件并行解析 ----------
+def _reader_proc(src: Source, chunk_size: int, start_offset: int, start_row: int, q):
+    try:
+        for chunk in iter_chunks(src, chunk_size, start_offset, start_row):
+            q.put(chunk)
+        q.put(('done', src.path, None))
+    except Exception as e:
+        q.put(('error', src.path, repr(e)))
+
+
+def parallel_chunks(jobs: list, chunk_size: int, workers: int) -> Iterator[Chunk]:
+    """
+    jobs: [(Source, start_offset, start_row), ...]
+    最多 workers 个子进程同时解析不同文件，chunk 按到达顺序产出（同一文件内保持顺序）。
+    队列有界，主进程推送跟不上时子进程自然阻塞，内存不会无限增长。
+    子进程未回报 done / error 就退出（OOM 被杀、spawn 启动时崩溃等）时抛 RuntimeError，不会一直等下去。
+    """
+    if workers <= 1 or len(jobs) <= 1:
+        for src, off, row in jobs:
+            yield from iter_chunks(src, chunk_size, off, row)
+        return
+
+    ctx = mp.get_context('spawn')
+    q = ctx.Queue(maxsize=max(2, 2 * workers))
+    # 子进程的 stdin 指向 /dev/null，stdin 只能在主进程里读；其间子进程先解析文件，填满有界队列后等待
+    local = [j for j in jobs if j[0].path == '-']
+    pending = [j for j in jobs if j[0].path != '-']
+    procs = {}
+
+    def spawn():
+        while pending and len(procs) < workers:
+            src, off, row = pending.pop(0)
+            p = ctx.Process(target=_reader_proc, args=(src, chunk_size, off, row, q), daemon=True)
+            p.start()
+            procs[src.path] = p
+
+    try:
+        spawn()
+        for src, off, row in local:
+            yield from iter_chunks(src, chunk_size, off, row)
+        suspect = set()
+        while procs:
+            try:
+                item = q.get(timeout=READER_POLL)
+            except queue.Empty:
+                # 已退出的子进程的最后一条消息可能还在管道里：连续两次轮询都没等到才判定为异常退出
+                for path, p in procs.items():
+                    if p.exitcode is None:
+                        continue
+                    if path in suspect:
+                        raise RuntimeError(f"{path}: 解析子进程未回报结果即退出（exitcode={p.exitcode}）")
+                    suspect.add(path)
+                continue
+            if isinstance(item, Chunk):
+                yield item
+                continue
+            kind, path, err = item
+            procs.pop(path).join()
+            if kind == 'error':
+                raise RuntimeError(f"{path}: {err}")
+            spawn()
+    finally:
+        for p in procs.values():
+            p.terminate()
@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""
+多 job 共用一个 worker 集群：每个 job 一条独立的任务队列（lane），按权重公平分享弹出机会。
+
+Redis 键（<base> 即 TASK_LIST，默认 'crawler:tasks'）：
+  <base>                 默认 job（'default'）的队列，与旧版完全相同
+  <base>:job:<name>      其它 job 的队列；:enqueue_complete / :finished / :leases / :events /
+                         :enqueue_checkpoint 等派生键都挂在各自队列名下，完成检测互不影响
+  <base>:jobs            HASH  job 名 -> JSON {"weight": 权重, "mongo_prefix": 结果库前缀（可空）}
+                         master 入队时登记；worker 每 JOBS_REFRESH 秒重读，可在运行中改权重
+
+调度：平滑加权轮询（smooth weighted round-robin）选出本次优先的 lane，
+其余 lane 按权重降序排在后面一起交给 BLMPOP —— 优先 lane 为空时同一次往返直接落到下一个，
+所以忙时按权重分配、闲时不浪费。
+"""
+import json
+import re
+from typing import Optional
+
+DEFAULT_JOB = 'default'
+
+_JOB_NAME = re.compile(r'^[A-Za-z0-9_-]{1,32}$')
+
+
+def check_job_name(name: str) -> str:
+    # 会拼进 Redis 键和 Mongo 库名，限制字符集与长度
+    if not _JOB_NAME.match(name):
+        raise ValueError(f"invalid job name {name!r}: 只允许字母、数字、'_'、'-'，最长 32")
+    return name
+
+
+def job_list_key(base: str, job: str) -> str:
+    if job in ('', DEFAULT_JOB):
+        return base
+    return f'{base}:job:{check_job_name(job)}'
+
+
+def jobs_key(base: str) -> str:
+    return f'{base}:jobs'
+
+
+def encode_job(weight: int, mongo_prefix: str = '') -> str:
+    return json.dumps({'weight': weight, 'mongo_prefix': mongo_prefix})
+
+
+def decode_job(raw) -> dict:
+    try:
+        spec = json.loads(raw)
+    except (TypeError, ValueError):
+        spec = {}
+    if not isinstance(spec, dict):
+        spec = {}
+    try:
+        weight = max(1, int(spec.get('weight', 1)))
+    except (TypeError, ValueError):
+        weight = 1
+    return {'weight': weight, 'mongo_prefix': spec.get('mongo_prefix') or ''}
+
+
+def new_job_stats() -> dict:
+    return {'attempts': 0, 'ok': 0, 'fail': 0, 'in_flight': 0, 'written': 0}
+
+
+class Lane:
+    __slots__ = ('name', 'key', 'weight', 'mongo_prefix', 'stats', 'coord', 'finished', 'task', 'current')
+
+    def __init__(self, name: str, key: str, weight: int, mongo_prefix: str):
+        self.name = name
+        self.key = key
+        self.weight = weight
+        self.mongo_prefix = mongo_prefix
+        self.stats = new_job_stats()
+        self.coord = None          # CompletionCoordinator，由 worker 创建
+        self.finished = None       # asyncio.Event，job 完成时由协调协程置位
+        self.task = None
+        self.current = 0           # 平滑加权轮询的当前值
+
+
+class LaneScheduler:
+    def __init__(self):
+        self.lanes: dict = {}      # name -> Lane（含已完成的，结果写库时仍要查前缀）
+        self._by_key: dict = {}
+        self.active: list = []
+
+    def add(self, lane: Lane):
+        self.lanes[lane.name] = lane
+        self._by_key[lane.key] = lane
+        self.activate(lane)
+
+    def activate(self, lane: Lane):
+        if lane not in self.active:
+            lane.current = 0
+            self.active.append(lane)
+
+    def deactivate(self, lane: Lane):
+        if lane in self.active:
+            self.active.remove(lane)
+
+    def get(self, name: str) -> Optional[Lane]:
+        return self.lanes.get(name)
+
+    def by_key(self, key) -> Optional[Lane]:
+        if isinstance(key, bytes):
+            key = key.decode()
+        return self._by_key.get(key)
+
+    def order(self) -> list:
+        """本次弹出的 lane 顺序：轮询选中的在前，其余按权重降序。"""
+        lanes = self.active
+        if len(lanes) <= 1:
+            return list(lanes)
+        total = 0
+        best = None
+        for lane in lanes:
+            lane.current += lane.weight
+            total += lane.weight
+            if best is None or lane.current > best.current:
+                best = lane
+        best.current -= total
+        rest = sorted((l for l in lanes if l is not best), key=lambda l: -l.weight)
+        return [best] + rest
+
+    def summary(self) -> str:
+        if len(self.lanes) <= 1:
+            return ""
+        parts = []
+        for lane in self.lanes.values():
+            s = lane.stats
+            state = '' if lane in self.active else ',done'
+            parts.append(f"{lane.name}(w={lane.weight}{state}) ok={s['ok']:,} fail={s['fail']:,} 尝试={s['attempts']:,}")
+        return "jobs: " + "; ".join(parts)
@@ -0,0 +1,211 @@
+#!/usr/bin/env python3
+"""
+链接发现（frontier 扩展）：
+
+  - extract_links()：从 HTML 取 <a href>（selectolax > lxml > 标准库 html.parser，按可用性选择），
+    按 <base href> 解析相对地址，规范化、页内去重、按范围过滤、截断到 max_links。
+    纯函数，Frontier 把它放进进程池（或默认线程池）执行，不占事件循环
+  - Frontier.push()：一次 Lua 调用完成一批链接的“去重 + 分配编号 + 入队”：
+      <list>:seen     SET  规范化 URL 的 64 位 blake2b 摘要（8 字节，省内存）
+      <list>:next_id  STR  发现链接的编号序列（INCRBY 一次取一段）
+    入队前按 host 轮转交错，与 master 的交错入队一致，避免同 host 突发
+
+新条目为 'id#1@depth url'（见 aio_crawler_records.py）；worker 在释放租约之前 push，
+所以完成检测不会在链接入队前误判队列已空。
+"""
+import asyncio
+import hashlib
+import time
+from collections import OrderedDict
+from html.parser import HTMLParser
+from typing import Optional
+from urllib.parse import urljoin, urlsplit, urlunsplit
+
+try:
+    from selectolax.parser import HTMLParser as SlxParser
+except ImportError:
+    SlxParser = None
+
+try:
+    import lxml.html as lxml_html
+except ImportError:
+    lxml_html = None
+
+PUSH_CHUNK = 5000
+_SKIP_PREFIXES = ('#', 'javascript:', 'mailto:', 'tel:', 'data:', 'about:')
+_DEFAULT_PORTS = {'http': 80, 'https': 443}
+
+# 返回新入队条数
+_PUSH_LUA = """
+local fresh = {}
+for i = 1, #ARGV, 2 do
+  if redis.call('SADD', KEYS[1], ARGV[i]) == 1 and ARGV[i + 1] ~= '' then
+    fresh[#fresh + 1] = ARGV[i + 1]
+  end
+end
+if #fresh == 0 then return 0 end
+local first = redis.call('INCRBY', KEYS[2], #fresh) - #fresh
+local batch = {}
+for i = 1, #fresh do
+  batch[#batch + 1] = string.format('%d', first + i - 1) .. fresh[i]
+  if #batch == 1000 then
+    redis.call('LPUSH', KEYS[3], unpack(batch))
+    batch = {}
+  end
+end
+if #batch > 0 then redis.call('LPUSH', KEYS[3], unpack(batch)) end
+return #fresh
+"""
+
+
+def normalize_url(href: str, base: str) -> Optional[str]:
+    """相对地址补全；只留 http(s)；小写 scheme/host，去默认端口、userinfo 与 fragment。"""
+    href = href.strip()
+    if not href or href.lower().startswith(_SKIP_PREFIXES):
+        return None
+    try:
+        u = urlsplit(urljoin(base, href))
+        port = u.port
+    except ValueError:
+        return None
+    scheme = u.scheme.lower()
+    host = u.hostname
+    if scheme not in _DEFAULT_PORTS or not host:
+        return None
+    if ':' in host:
+        host = f'[{host}]'
+    netloc = host if port is None or port == _DEFAULT_PORTS[scheme] else f'{host}:{port}'
+    return urlunsplit((scheme, netloc, u.path or '/', u.query, ''))
+
+
+def url_key(url: str) -> bytes:
+    return hashlib.blake2b(url.encode(), digest_size=8).digest()
+
+
+class _AnchorCollector(HTMLParser):
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.base = None
+        self.anchors = []
+
+    def handle_starttag(self, tag, attrs):
+        if tag == 'a':
+            a = dict(attrs)
+            if a.get('href'):
+                self.anchors.append((a['href'], a.get('rel') or ''))
+        elif tag == 'base' and self.base is None:
+            self.base = dict(attrs).get('href')
+
+
+def _anchors(html: str):
+    """返回 (base_href or None, [(href, rel), ...])"""
+    if SlxParser is not None:
+        tree = SlxParser(html)
+        node = tree.css_first('base[href]')
+        base = node.attributes.get('href') if node is not None else None
+        return base, [(n.attributes.get('href') or '', n.attributes.get('rel') or '') for n in tree.css('a[href]')]
+    if lxml_html is not None:
+        try:
+            doc = lxml_html.document_fromstring(html)
+        except Exception:
+            return None, []
+        base = doc.xpath('string(//base/@href)') or None
+        return base, [(a.get('href') or '', a.get('rel') or '') for a in doc.xpath('//a[@href]')]
+    p = _AnchorCollector()
+    try:
+        p.feed(html)
+        p.close()
+    except Exception:
+        pass
+    return p.base, p.anchors
+
+
+def extract_links(html: str, page_url: str, scope: str = 'host', max_links: int = 200) -> list:
+    """scope: 'host' 只保留与页面同 host 的链接；'any' 不限。跳过 rel=nofollow。"""
+    if '<a' not in html and '<A' not in html:
+        return []
+    base_href, anchors = _anchors(html)
+    base = urljoin(page_url, base_href) if base_href else page_url
+    page_host = urlsplit(page_url).hostname
+    out = OrderedDict()
+    for href, rel in anchors:
+        if 'nofollow' in rel.lower():
+            continue
+        url = normalize_url(href, base)
+        if url is None or url in out:
+            continue
+        if scope == 'host' and urlsplit(url).hostname != page_host:
+            continue
+        out[url] = None
+        if len(out) >= max_links:
+            break
+    return list(out)
+
+
+def interleave_by_host(links: list) -> list:
+    """[(url, depth), ...] 按 host 轮转排列。"""
+    buckets: OrderedDict = OrderedDict()
+    for item in links:
+        buckets.setdefault(urlsplit(item[0]).hostname or '', []).append(item)
+    if len(buckets) <= 1:
+        return list(links)
+    queues = [iter(b) for b in buckets.values()]
+    out = []
+    while queues:
+        alive = []
+        for q in queues:
+            item = next(q, None)
+            if item is not None:
+                out.append(item)
+                alive.append(q)
+        queues = alive
+    return out
+
+
+class Frontier:
+    def __init__(self, redis_conn, *, max_depth: int, scope: str = 'host', max_links: int = 200,
+                 executor=None):
+        self.redis = redis_conn
+        self.max_depth = max_depth
+        self.scope = scope
+        self.max_links = max_links
+        self.executor = executor
+        self._push = redis_conn.register_script(_PUSH_LUA)
+        self.counters = {'pages': 0, 'found': 0, 'pushed': 0, 'parse_seconds': 0.0}
+
+    def wants(self, task) -> bool:
+        return task.depth < self.max_depth
+
+    async def extract(self, task, html: str) -> list:
+        t0 = time.perf_counter()
+        loop = asyncio.get_running_loop()
+        try:
+            links = await loop.run_in_executor(self.executor, extract_links, html, task.url,
+                                               self.scope, self.max_links)
+        except Exception:
+            links = []
+        self.counters['pages'] += 1
+        self.counters['found'] += len(links)
+        self.counters['parse_seconds'] += time.perf_counter() - t0
+        return [(u, task.depth + 1) for u in links]
+
+    async def push(self, list_key: str, links: list, crawled: list = ()) -> int:
+        """links: [(url, depth)]；crawled: 本批已抓的 URL，只标记为已见，防止被重新发现后重复入队。"""
+        argv = []
+        for url in crawled:
+            argv += [url_key(normalize_url(url, url) or url), '']
+        for url, depth in interleave_by_host(links):
+            argv += [url_key(url), f'#1@{depth} {url}']
+        keys = [f'{list_key}:seen', f'{list_key}:next_id', list_key]
+        n = 0
+        # 每次脚本调用最多 PUSH_CHUNK 条，避免单个脚本长时间阻塞 Redis
+        for i in range(0, len(argv), 2 * PUSH_CHUNK):
+            n += int(await self._push(keys=keys, args=argv[i:i + 2 * PUSH_CHUNK]))
+        self.counters['pushed'] += n
+        return n
+
+
+def links_summary(counters: dict) -> str:
+    c = counters
+    avg = c['parse_seconds'] / c['pages'] * 1000 if c['pages'] else 0.0
+    return f"发现: 页面={c['pages']:,} 链接={c['found']:,} 新入队={c['pushed']:,} 解析={avg:.1f}ms/页"
@@ -1,21 +1,44 @@
 #!/usr/bin/env python3
 from __future__ import annotations
 import asyncio
-import csv
+import json
+import os
 import random
 import time
 import math
+import sys
 import argparse
 from collections import defaultdict, deque
 from urllib.parse import urlparse
 
 import redis.asyncio as aioredis
 
+from aio_crawler_config import load_config, print_config
+from aio_crawler_input import Source, parallel_chunks
+from aio_crawler_jobs import DEFAULT_JOB, encode_job, job_list_key
+
 # =============== CONFIG ===============
 CSV_FILE = 'google_url.csv'            # 全量 URL CSV，首行为表头
 REDIS_URL = 'redis://localhost:6379/0'
 TASK_LIST = 'crawler:tasks'
 DONE_KEY  = f'{TASK_LIST}:enqueue_complete'
+FINISHED_KEY   = f'{TASK_LIST}:finished'   # worker 集群完成标志（见 aio_crawler_cluster.py）
+EVENTS_CHANNEL = f'{TASK_LIST}:events'
+
+# 多 job（见 aio_crawler_jobs.py）：JOB 非空时推入独立队列 <TASK_LIST>:job:<JOB>，
+# DONE_KEY / 检查点等派生键随之改为该队列名下；worker 按 JOB_WEIGHT 加权公平弹出
+JOB              = ''                  # 为空即默认 job（旧队列 TASK_LIST）
+JOB_WEIGHT       = 1                   # 调度权重，例如紧急重抓 10、大批量 1
+JOB_MONGO_PREFIX = ''                  # 结果库前缀；为空由 worker 决定（results_<job>_）
+JOBS_KEY         = f'{TASK_LIST}:jobs'
+
+# 输入（见 aio_crawler_input.py）：边解压边解析，支持 .gz/.bz2/.xz/.zst 与 csv/tsv/jsonl/parquet，'-' 为 stdin
+INPUT_FILES    = []                    # 多个输入文件；为空时只读 CSV_FILE
+INPUT_FORMAT   = ''                    # csv/tsv/jsonl/parquet；为空按扩展名识别
+URL_COLUMN     = ''                    # 列名或列号；为空沿用旧规则（csv 单列取第 0 列否则第 1 列，jsonl 取 url）
+ID_COLUMN      = ''                    # 列名或列号；为空时按读入顺序编号
+CSV_HEADER     = True                  # csv/tsv 首行是否为表头
+INGEST_WORKERS = 1                     # 多文件时并行解析的进程数
 
 # 控制本次要推入多少条（0/None 表示不限制）
 TEST_LIMIT = 0
@@ -25,7 +48,31 @@ CHUNK_SIZE     = 100_000               # 每次读入并处理的行数
 PIPELINE_BATCH = 10_000                # 每批 LPUSH 条数
 PRINT_EVERY    = 100_000               # 入队进度打印频率
 HOST_TAKE_PER_ROUND = 1                # 每轮从 host 桶取多少条
+
+# 断点续推：每个 chunk 推完后记录各输入文件的偏移与行号，--resume 直接 seek 过去（stdin 不支持）
+#   'redis'：检查点与该 chunk 的 LPUSH 在同一个 MULTI 事务里提交（恰好一次）
+#   'file' ：chunk 推完后原子写本地文件（至多重推最后一个 chunk）
+#   'off'  ：不记录
+CHECKPOINT      = 'redis'
+CHECKPOINT_KEY  = f'{TASK_LIST}:enqueue_checkpoint'
+CHECKPOINT_FILE = 'enqueue_checkpoint.json'
 # ======================================
+# 以上常量均可用 TOML / 环境变量 CRAWLER_<NAME> / 命令行 --<name> 覆盖，见 aio_crawler_config.py
+
+def configure(overrides: dict):
+    g = globals()
+    g.update(overrides)
+    if 'JOBS_KEY' not in overrides:
+        g['JOBS_KEY'] = f'{TASK_LIST}:jobs'
+    g['TASK_LIST'] = job_list_key(TASK_LIST, JOB)
+    if 'DONE_KEY' not in overrides:
+        g['DONE_KEY'] = f'{TASK_LIST}:enqueue_complete'
+    if 'FINISHED_KEY' not in overrides:
+        g['FINISHED_KEY'] = f'{TASK_LIST}:finished'
+    if 'EVENTS_CHANNEL' not in overrides:
+        g['EVENTS_CHANNEL'] = f'{TASK_LIST}:events'
+    if 'CHECKPOINT_KEY' not in overrides:
+        g['CHECKPOINT_KEY'] = f'{TASK_LIST}:enqueue_checkpoint'
 
 def _host_from_entry(entry: str) -> str:
     try:
@@ -64,21 +111,106 @@ def _interleave_by_host_weighted(rows: list[str]) -> list[str]:
 
     return out
 
-async def push_chunk(redis_conn, rows: list[str]) -> int:
+async def push_chunk(redis_conn, rows: list[str], checkpoint: dict | None = None) -> int:
     ordered = _interleave_by_host_weighted(rows)
+    if checkpoint is not None and CHECKPOINT == 'redis':
+        # 整个 chunk 与检查点同一事务提交：要么都在，要么都不在
+        async with redis_conn.pipeline(transaction=True) as pipe:
+            for i in range(0, len(ordered), PIPELINE_BATCH):
+                pipe.lpush(TASK_LIST, *ordered[i:i + PIPELINE_BATCH])
+            pipe.set(CHECKPOINT_KEY, json.dumps(checkpoint))
+            await pipe.execute()
+        return len(ordered)
+
     total = 0
     for i in range(0, len(ordered), PIPELINE_BATCH):
         batch = ordered[i:i + PIPELINE_BATCH]
         await redis_conn.lpush(TASK_LIST, *batch)
         total += len(batch)
+    if checkpoint is not None and CHECKPOINT == 'file':
+        _write_checkpoint_file(checkpoint)
     return total
 
-async def main(force: bool):
+# ---------- 检查点 ----------
+def _write_checkpoint_file(checkpoint: dict):
+    tmp = f"{CHECKPOINT_FILE}.tmp"
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump(checkpoint, f)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, CHECKPOINT_FILE)
+
+async def load_checkpoint(redis_conn) -> dict | None:
+    if CHECKPOINT == 'redis':
+        raw = await redis_conn.get(CHECKPOINT_KEY)
+        return json.loads(raw) if raw else None
+    if CHECKPOINT == 'file' and os.path.exists(CHECKPOINT_FILE):
+        with open(CHECKPOINT_FILE, encoding='utf-8') as f:
+            return json.load(f)
+    return None
+
+async def save_checkpoint(redis_conn, checkpoint: dict):
+    if CHECKPOINT == 'redis':
+        await redis_conn.set(CHECKPOINT_KEY, json.dumps(checkpoint))
+    elif CHECKPOINT == 'file':
+        _write_checkpoint_file(checkpoint)
+
+async def clear_checkpoint(redis_conn):
+    if CHECKPOINT == 'redis':
+        await redis_conn.delete(CHECKPOINT_KEY)
+    elif CHECKPOINT == 'file' and os.path.exists(CHECKPOINT_FILE):
+        os.remove(CHECKPOINT_FILE)
+
+def _upgrade_checkpoint(ckpt: dict) -> dict:
+    """旧版检查点（只有 CSV_FILE 一个文件）转成按文件记录的格式。"""
+    if 'sources' in ckpt:
+        return ckpt
+    pos = {k: ckpt[k] for k in ('file', 'size', 'mtime', 'offset', 'row')}
+    pos['done'] = bool(ckpt.get('complete'))
+    return {'sources': {ckpt['file']: pos}, 'next_idx': ckpt['row'],
+            'pushed': ckpt['pushed'], 'complete': bool(ckpt.get('complete'))}
+
+def build_sources() -> list[Source]:
+    paths = list(dict.fromkeys(INPUT_FILES or [CSV_FILE]))
+    return [Source(p, INPUT_FORMAT, URL_COLUMN, ID_COLUMN, CSV_HEADER) for p in paths]
+
+async def main(force: bool, resume: bool = False):
     redis_conn = aioredis.Redis.from_url(REDIS_URL, decode_responses=False)
 
+    sources = build_sources()
+    idents = [s.identity() for s in sources]
+    keys = {s.path: ident['file'] for s, ident in zip(sources, idents)}
+    desc = [f"{s.path}({s.fmt}{'+' + s.compression if s.compression else ''})" for s in sources]
+    print(f"INPUT: {', '.join(desc)} | ingest_workers={INGEST_WORKERS}")
+
+    ckpt = None
+    if resume:
+        if not all(s.resumable for s in sources):
+            print("ABORT: stdin 输入没有可 seek 的位置，无法 --resume")
+            return
+        ckpt = await load_checkpoint(redis_conn) if CHECKPOINT != 'off' else None
+        if not ckpt:
+            print(f"ABORT: 没有可用的检查点（CHECKPOINT={CHECKPOINT}），无法 --resume")
+            return
+        ckpt = _upgrade_checkpoint(ckpt)
+        saved = ckpt['sources']
+        changed = [ident['file'] for ident in idents
+                   if {k: saved.get(ident['file'], {}).get(k) for k in ident} != ident]
+        changed += [f for f in saved if f not in keys.values()]
+        if changed:
+            print(f"ABORT: 检查点对应的输入文件与当前不一致（新增/缺少/大小或修改时间不同）: {', '.join(changed)}")
+            return
+        if ckpt.get('complete'):
+            print(f"RESUME: 检查点显示入队已完成（pushed={ckpt['pushed']}），无需续推")
+            return
+        print(f"RESUME: 已推 {ckpt['pushed']} 条，从编号 {ckpt['next_idx']} 继续")
+        for f, pos in saved.items():
+            state = '已读完' if pos['done'] else f"第 {pos['row']} 行（字节偏移 {pos['offset']}）"
+            print(f"  {f}: {state}")
+        await redis_conn.delete(DONE_KEY)
     # 默认不清空，除非加 --force
-    if force:
-        await redis_conn.delete(TASK_LIST)
+    elif force:
+        await redis_conn.delete(TASK_LIST, f'{TASK_LIST}:parked')
         await redis_conn.delete(DONE_KEY)
         print(f"WARNING: 清空了旧队列 {TASK_LIST} 和标志 {DONE_KEY}")
     else:
@@ -87,40 +219,84 @@ async def main(force: bool):
             print(f"ABORT: 队列 {TASK_LIST} 里已有 {qlen} 条任务。若要清空并重建，请加 --force")
             return
         await redis_conn.delete(DONE_KEY)  # 不删队列，但清理旧标志位
+    await redis_conn.delete(FINISHED_KEY)
+    if not resume and CHECKPOINT != 'off':
+        await clear_checkpoint(redis_conn)
+    # 入队开始前登记 job，已在运行的 worker（JOBS=['*']）下次刷新注册表即开始消费
+    await redis_conn.hset(JOBS_KEY, JOB or DEFAULT_JOB, encode_job(JOB_WEIGHT, JOB_MONGO_PREFIX))
+    print(f"JOB: {JOB or DEFAULT_JOB} | queue={TASK_LIST} | weight={JOB_WEIGHT}")
 
-    pushed = 0
-    chunk: list[str] = []
+    # 每个文件“已推到哪里”：offset / row 为最后一条已入队记录之后的位置
+    positions = {ident['file']: {**ident, 'offset': 0, 'row': 0, 'done': False} for ident in idents}
+    if ckpt:
+        positions.update(ckpt['sources'])
+    pushed = ckpt['pushed'] if ckpt else 0
+    next_idx = ckpt['next_idx'] if ckpt else 0
+    missing_id = 0
+    malformed = 0
     t0 = time.monotonic()
 
-    with open(CSV_FILE, newline='', encoding='utf-8') as f:
-        reader = csv.reader(f)
-        next(reader, None)  # 跳过表头
+    def make_ckpt(pending: int, complete: bool = False):
+        if CHECKPOINT == 'off':
+            return None
+        return {'sources': positions, 'next_idx': next_idx, 'pushed': pushed + pending, 'complete': complete}
 
-        for idx, row in enumerate(reader):
-            if TEST_LIMIT and idx >= TEST_LIMIT:
+    jobs = []
+    for s in sources:
+        pos = positions[keys[s.path]]
+        if not pos['done']:
+            jobs.append((s, pos['offset'], pos['row']))
+
+    chunks = parallel_chunks(jobs, CHUNK_SIZE, INGEST_WORKERS)
+    try:
+        for chunk in chunks:
+            urls, ids = chunk.urls, chunk.ids
+            malformed += chunk.skipped
+            room = TEST_LIMIT - next_idx if TEST_LIMIT else None
+            if room is not None and room <= 0:
                 break
-            url = row[0] if len(row) == 1 else row[1]
-            entry = f"{idx} {url}"
-            chunk.append(entry)
+            truncated = room is not None and room < len(urls)
+            if truncated:
+                urls = urls[:room]
+                ids = ids[:room] if ids is not None else None
+
+            entries: list[str] = []
+            for i, url in enumerate(urls):
+                if ids is None:
+                    entries.append(f"{next_idx} {url}")
+                elif ids[i] is not None:
+                    entries.append(f"{ids[i]} {url}")
+                else:
+                    missing_id += 1
+                next_idx += 1
 
-            if len(chunk) >= CHUNK_SIZE:
-                cnt = await push_chunk(redis_conn, chunk)
+            # 截断的 chunk 只会出现在 TEST_LIMIT 处，此时不更新文件位置（本次运行到此为止）
+            if not truncated:
+                positions[keys[chunk.path]].update(offset=chunk.offset, row=chunk.row, done=chunk.last)
+            if entries:
+                cnt = await push_chunk(redis_conn, entries, make_ckpt(len(entries)))
                 pushed += cnt
-                chunk.clear()
-                if PRINT_EVERY and pushed % PRINT_EVERY == 0:
+                if PRINT_EVERY and pushed // PRINT_EVERY != (pushed - cnt) // PRINT_EVERY:
                     print(f"ENQUEUE_PROGRESS: {pushed} pushed")
+            if truncated:
+                break
+    finally:
+        chunks.close()
 
-    if chunk:
-        cnt = await push_chunk(redis_conn, chunk)
-        pushed += cnt
-        chunk.clear()
-
+    if CHECKPOINT != 'off':
+        await save_checkpoint(redis_conn, make_ckpt(0, complete=True))
     await redis_conn.set(DONE_KEY, "1")
+    # 通知已在运行的 worker 立即做一次完成检查
+    await redis_conn.publish(EVENTS_CHANNEL, "enqueue_complete")
 
     qlen = await redis_conn.llen(TASK_LIST)
     t1 = time.monotonic()
 
     print(f"\nENQUEUE_COMPLETE: pushed={pushed}, queue_len={qlen}")
+    if missing_id:
+        print(f"WARNING: {missing_id} 行缺少 {ID_COLUMN} 列的值，已跳过")
+    if malformed:
+        print(f"WARNING: {malformed} 行格式错误（非法 JSON / id 不是整数 / 列数不够等），已跳过")
     print("START_WORKERS: 所有 URL 已按 host 分桶并随机交错入队。现在可以启动 worker。\n")
 
     if qlen == pushed and pushed > 0:
@@ -130,10 +306,16 @@ async def main(force: bool):
 
 if __name__ == '__main__':
     parser = argparse.ArgumentParser()
-    parser.add_argument("--force", action="store_true", help="清空旧队列并重建")
-    args = parser.parse_args()
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument("--force", action="store_true", help="清空旧队列并重建")
+    mode.add_argument("--resume", action="store_true", help="从上次的入队检查点继续（不清空、不检查队列是否为空）")
+    overrides, args = load_config(globals(), parser=parser)
+    configure(overrides)
+    if args.print_config:
+        print_config(globals(), overrides)
+        sys.exit(0)
 
-    asyncio.run(main(args.force))
+    asyncio.run(main(args.force, args.resume))
 
 
 
@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+"""
+抓取热路径上的轻量数据结构（只依赖标准库）：
+
+  - Task：队列条目解析一次，host 随条目携带，重试 / 亲和排序 / 记录都不再重复 urlparse
+  - Result：一次尝试的最终结果，__slots__ 对象直接放进写库队列，
+            到 db_writer 里才用 to_doc() 转成 Mongo 文档（BSON 编码由驱动在 insert 时完成）
+  - utc_ts()：按秒缓存的 ISO 时间戳，同一秒内的尝试共用一个字符串
+
+队列条目格式（兼容旧数据）：
+  1) 'idx url'            -> attempt = 1
+  2) 'idx#attempt url'    -> attempt = int(attempt)
+  3) 'idx#attempt@depth url' -> 链接发现产生的条目（depth >= 1，见 aio_crawler_links.py）；
+                               种子条目 depth = 0，不写 '@'
+"""
+import time
+from urllib.parse import urlparse
+
+_ts_sec = -1
+_ts_str = ''
+
+
+def utc_ts() -> str:
+    global _ts_sec, _ts_str
+    now = int(time.time())
+    if now != _ts_sec:
+        _ts_sec = now
+        _ts_str = time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(now))
+    return _ts_str
+
+
+def url_netloc(url: str) -> str:
+    """等价于 urlparse(url).netloc 的快速版本（只处理常见的 scheme://netloc/... 形式）。"""
+    i = url.find('//')
+    if i < 0:
+        return urlparse(url).netloc
+    end = len(url)
+    for sep in '/?#':
+        j = url.find(sep, i + 2)
+        if 0 <= j < end:
+            end = j
+    return url[i + 2:end]
+
+
+class Task:
+    __slots__ = ('base_idx', 'attempt', 'url', 'host', 'depth')
+
+    def __init__(self, base_idx: int, attempt: int, url: str, host: str, depth: int = 0):
+        self.base_idx = base_idx
+        self.attempt = attempt
+        self.url = url
+        self.host = host
+        self.depth = depth
+
+    def entry(self) -> bytes:
+        return make_entry(self.base_idx, self.attempt, self.url, self.depth)
+
+    def retry_entry(self) -> bytes:
+        return make_entry(self.base_idx, self.attempt + 1, self.url, self.depth)
+
+
+def _parse(entry_bytes: bytes):
+    s = entry_bytes.decode()
+    head, url = s.split(' ', 1)
+    depth = 0
+    if '@' in head:
+        head, depth_str = head.split('@', 1)
+        depth = int(depth_str)
+    if '#' in head:
+        base_idx_str, attempt_str = head.split('#', 1)
+        base_idx = int(base_idx_str)
+        attempt = int(attempt_str)
+    else:
+        base_idx = int(head)
+        attempt = 1
+    return base_idx, attempt, depth, url
+
+
+def parse_entry(entry_bytes: bytes):
+    """
+    返回: (base_idx:int, attempt:int, url:str)
+    """
+    base_idx, attempt, _, url = _parse(entry_bytes)
+    return base_idx, attempt, url
+
+
+def parse_task(entry_bytes: bytes) -> Task:
+    base_idx, attempt, depth, url = _parse(entry_bytes)
+    return Task(base_idx, attempt, url, url_netloc(url), depth)
+
+
+def make_entry(base_idx: int, attempt: int, url: str, depth: int = 0) -> bytes:
+    if depth:
+        return f"{base_idx}#{attempt}@{depth} {url}".encode()
+    return f"{base_idx}#{attempt} {url}".encode()
+
+
+class Result:
+    """
+    success=True  -> pages 文档：payload 为 html(str) 或 {'html_len': n}
+    success=False -> failed_tasks 文档：status 为 HTTP 状态码或 None（记为 'ERR'）
+    job 为所属 job 名（决定写入哪组结果库，见 aio_crawler_jobs.py），不进文档
+    """
+    __slots__ = ('success', 'task', 'status', 'payload', 'ts', 'run_id', 'job')
+
+    def __init__(self, success: bool, task: Task, status, payload, ts: str, run_id=0, job: str = ''):
+        self.success = success
+        self.task = task
+        self.status = status
+        self.payload = payload
+        self.ts = ts
+        self.run_id = run_id
+        self.job = job
+
+    @property
+    def base_idx(self) -> int:
+        return self.task.base_idx
+
+    def doc_id(self):
+        t = self.task
+        # 发现的链接另有编号序列（<list>:next_id），加 'd' 前缀与种子编号区分
+        idx = f"d{t.base_idx}" if t.depth else t.base_idx
+        return f"{self.run_id}-{idx}" if self.run_id else idx
+
+    def to_doc(self) -> dict:
+        t = self.task
+        if self.success:
+            doc = {
+                '_id': self.doc_id(),
+                'url': t.url,
+                'host': t.host,
+                'http_status_code': self.status,
+            }
+            if isinstance(self.payload, dict):
+                doc['html_len'] = self.payload.get('html_len', 0)
+            else:
+                doc['html'] = self.payload
+            doc['crawl_timestamp'] = self.ts
+            if t.depth:
+                doc['depth'] = t.depth
+            return doc
+        doc = {
+            'task_id': self.doc_id(),
+            'url': t.url,
+            'host': t.host,
+            'status': self.status if self.status is not None else 'ERR',
+            'failed_at': self.ts,
+            'rounds': t.attempt,
+        }
+        if t.depth:
+            doc['depth'] = t.depth
+        return doc
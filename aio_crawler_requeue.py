@@ -0,0 +1,193 @@
+#!/usr/bin/env python3
+"""
+把 failed_tasks 里的失败记录按 host / 状态筛出来，批量推进一个带权重的重试 job（见 aio_crawler_jobs.py）。
+
+  python aio_crawler_requeue.py --requeue-status 503,ERR --requeue-job retry-503 --requeue-weight 10
+  python aio_crawler_requeue.py --requeue-hosts example.com --dry-run
+  python aio_crawler_requeue.py --indexes-only          # 只给所有结果库建索引（见 aio_crawler_indexes.py）
+
+流程：按 SOURCE_DB_PREFIX 找出源结果库 -> 每个库一个 batch_size 游标（筛选走 (status, host) / host 索引）
+-> 每 REQUEUE_BATCH 条按 host 交错后 LPUSH 进 <TASK_LIST>:job:<REQUEUE_JOB>
+-> 同一批记录 update_many 打上 requeued_at / requeue_job，下次运行默认跳过（TTL 索引到期清理）。
+先推后标记：中途中断最多重推最后一批，不会漏。全部推完后置 enqueue_complete，worker 照常做完成检测。
+"""
+from __future__ import annotations
+import asyncio
+import argparse
+import sys
+import time
+from collections import Counter
+from datetime import datetime, timezone
+
+import redis.asyncio as aioredis
+import motor.motor_asyncio
+
+from aio_crawler_config import load_config, print_config
+from aio_crawler_indexes import ensure_indexes
+from aio_crawler_jobs import encode_job, job_list_key
+from aio_crawler_links import interleave_by_host
+
+# =============== CONFIG ===============
+REDIS_URL        = 'redis://localhost:6379/0'
+TASK_LIST        = 'crawler:tasks'          # 基础队列名，目标队列为 <TASK_LIST>:job:<REQUEUE_JOB>
+JOBS_KEY         = f'{TASK_LIST}:jobs'
+
+MONGO_URI        = 'mongodb://localhost:27017'
+MONGO_DB_PREFIX  = 'results_'
+SOURCE_DB_PREFIX = ''                       # 读哪组结果库的失败记录；为空即 MONGO_DB_PREFIX（默认 job）
+
+REQUEUE_HOSTS    = []                       # 只重推这些 host（精确匹配 failed_tasks.host）；为空不限
+REQUEUE_STATUS   = []                       # 只重推这些状态，如 503,ERR,ROBOTS；为空不限
+REQUEUE_JOB      = 'retry'
+REQUEUE_WEIGHT   = 5                        # 重试 job 的调度权重
+REQUEUE_LIMIT    = 0                        # 最多重推多少条（0 不限）
+REQUEUE_BATCH    = 5000                     # 游标 batch_size 与每批 LPUSH / 标记的条数
+INCLUDE_REQUEUED = False                    # 也重推已被重推过的记录
+REQUEUED_TTL_DAYS = 30                      # 建索引时 requeued_at 的 TTL（天，0 不建）
+# ======================================
+# 以上常量均可用 TOML / 环境变量 CRAWLER_<NAME> / 命令行 --<name> 覆盖，见 aio_crawler_config.py
+
+def configure(overrides: dict):
+    g = globals()
+    g.update(overrides)
+    if 'JOBS_KEY' not in overrides:
+        g['JOBS_KEY'] = f'{TASK_LIST}:jobs'
+    if not SOURCE_DB_PREFIX:
+        g['SOURCE_DB_PREFIX'] = MONGO_DB_PREFIX
+
+def _status_value(s):
+    # 命令行 / 环境变量传进来的都是字符串；HTTP 状态码在库里是 int
+    s = str(s).strip()
+    return int(s) if s.isdigit() else s
+
+def build_query() -> dict:
+    query = {}
+    if REQUEUE_HOSTS:
+        query['host'] = {'$in': list(REQUEUE_HOSTS)}
+    if REQUEUE_STATUS:
+        query['status'] = {'$in': [_status_value(s) for s in REQUEUE_STATUS]}
+    if not INCLUDE_REQUEUED:
+        query['requeued_at'] = {'$exists': False}
+    return query
+
+def _entry(doc: dict) -> tuple[str, int]:
+    """failed_tasks 文档 -> ('idx#1[@depth] url', 发现链接编号 or -1)；沿用原编号，新库里的 _id 与原记录对得上。"""
+    raw = str(doc.get('task_id', ''))
+    idx = raw.rsplit('-', 1)[-1]
+    depth = int(doc.get('depth') or 0)
+    if idx.startswith('d'):
+        idx = idx[1:]
+    if depth:
+        return f"{idx}#1@{depth} {doc['url']}", int(idx)
+    return f"{idx}#1 {doc['url']}", -1
+
+async def _source_dbs(mongo) -> list[str]:
+    names = await mongo.list_database_names()
+    n = len(SOURCE_DB_PREFIX)
+    return sorted((x for x in names if x.startswith(SOURCE_DB_PREFIX) and x[n:].isdigit()),
+                  key=lambda x: int(x[n:]))
+
+# 发现链接沿用原 'd' 编号：把目标队列的 next_id 抬到其后，避免新发现的链接与之撞 _id
+_BUMP_LUA = """
+local cur = tonumber(redis.call('GET', KEYS[1]) or '0')
+if cur < tonumber(ARGV[1]) then redis.call('SET', KEYS[1], ARGV[1]) end
+return 0
+"""
+
+async def _flush(redis_conn, db, target: str, rows: list, ids: list) -> int:
+    """rows: [(url, entry)]"""
+    ordered = [entry for _, entry in interleave_by_host(rows)]
+    async with redis_conn.pipeline(transaction=False) as pipe:
+        for i in range(0, len(ordered), REQUEUE_BATCH):
+            pipe.lpush(target, *ordered[i:i + REQUEUE_BATCH])
+        await pipe.execute()
+    await db.failed_tasks.update_many(
+        {'_id': {'$in': ids}},
+        {'$set': {'requeued_at': datetime.now(timezone.utc), 'requeue_job': REQUEUE_JOB}},
+    )
+    return len(ordered)
+
+async def main(dry_run: bool, indexes_only: bool):
+    mongo = motor.motor_asyncio.AsyncIOMotorClient(MONGO_URI)
+    dbs = await _source_dbs(mongo)
+    if not dbs:
+        print(f"ABORT: 没有找到前缀为 {SOURCE_DB_PREFIX!r} 的结果库")
+        return
+
+    if indexes_only:
+        for name in dbs:
+            warnings = await ensure_indexes(mongo[name], REQUEUED_TTL_DAYS)
+            for w in warnings:
+                print(f"WARNING: 索引未建立 {w}")
+            print(f"INDEXES: {name} {'OK' if not warnings else f'{len(warnings)} 个失败'}")
+        return
+
+    query = build_query()
+    target = job_list_key(TASK_LIST, REQUEUE_JOB)
+    print(f"REQUEUE: dbs={len(dbs)} ({dbs[0]}..{dbs[-1]}) | filter={query} | "
+          f"target={target} | weight={REQUEUE_WEIGHT}{' | DRY RUN' if dry_run else ''}")
+
+    redis_conn = None
+    if not dry_run:
+        redis_conn = aioredis.Redis.from_url(REDIS_URL, decode_responses=False)
+        await redis_conn.delete(f'{target}:enqueue_complete', f'{target}:finished')
+        # 先登记 job，已在运行的 worker（JOBS=['*']）下次刷新注册表即开始消费
+        await redis_conn.hset(JOBS_KEY, REQUEUE_JOB, encode_job(REQUEUE_WEIGHT))
+
+    t0 = time.monotonic()
+    pushed = 0
+    max_discovered = -1
+    by_host: Counter = Counter()
+    by_status: Counter = Counter()
+    projection = {'task_id': 1, 'url': 1, 'host': 1, 'status': 1, 'depth': 1}
+    for name in dbs:
+        db = mongo[name]
+        rows: list = []
+        ids: list = []
+        cursor = db.failed_tasks.find(query, projection=projection, batch_size=REQUEUE_BATCH)
+        async for doc in cursor:
+            if REQUEUE_LIMIT and pushed + len(rows) >= REQUEUE_LIMIT:
+                break
+            if not doc.get('url'):
+                continue
+            entry, didx = _entry(doc)
+            rows.append((doc['url'], entry))
+            ids.append(doc['_id'])
+            max_discovered = max(max_discovered, didx)
+            by_host[doc.get('host') or ''] += 1
+            by_status[doc.get('status')] += 1
+            if len(rows) >= REQUEUE_BATCH:
+                pushed += len(rows) if dry_run else await _flush(redis_conn, db, target, rows, ids)
+                rows, ids = [], []
+        await cursor.close()
+        if rows:
+            pushed += len(rows) if dry_run else await _flush(redis_conn, db, target, rows, ids)
+        if REQUEUE_LIMIT and pushed >= REQUEUE_LIMIT:
+            break
+
+    if redis_conn is not None:
+        if max_discovered >= 0:
+            await redis_conn.eval(_BUMP_LUA, 1, f'{target}:next_id', max_discovered + 1)
+        await redis_conn.set(f'{target}:enqueue_complete', "1")
+        # 通知已在运行的 worker 立即做一次完成检查
+        await redis_conn.publish(f'{target}:events', "enqueue_complete")
+
+    top_hosts = ', '.join(f"{h or '?'}={n:,}" for h, n in by_host.most_common(10))
+    statuses = ', '.join(f"{s}={n:,}" for s, n in by_status.most_common())
+    print(f"  status: {statuses or '-'}")
+    print(f"  top hosts: {top_hosts or '-'}")
+    verb = 'matched' if dry_run else 'pushed'
+    print(f"\nREQUEUE_COMPLETE: {verb}={pushed:,}, job={REQUEUE_JOB}, elapsed={time.monotonic() - t0:.2f}s")
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument("--dry-run", action="store_true", help="只统计匹配的失败记录，不入队、不标记")
+    mode.add_argument("--indexes-only", action="store_true", help="只给源结果库建索引后退出")
+    overrides, args = load_config(globals(), parser=parser)
+    configure(overrides)
+    if args.print_config:
+        print_config(globals(), overrides)
+        sys.exit(0)
+
+    asyncio.run(main(args.dry_run, args.indexes_only))
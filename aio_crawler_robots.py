@@ -0,0 +1,204 @@
+#!/usr/bin/env python3
+"""
+robots.txt 子系统（解析用标准库 urllib.robotparser）：
+
+  - 每个 origin（scheme://host:port）同一时刻只有一个 robots.txt 请求，其余协程等同一个结果
+  - 解析结果本地缓存：TTL 到期重抓，超过 max_hosts 按 LRU 淘汰
+  - 可选 Redis 共享缓存：robots 原文与抓取时间写入 <prefix><origin>，多台从机不重复抓
+  - Crawl-delay / Request-rate 转成同 host 两次请求的最小间隔，由 pace() 排队；
+    排到的空档超过 max_delay 秒时不预约、不等待，调用方把条目停放到那时（不占协程干等）
+
+状态码处理参照 RFC 9309：
+  2xx 解析规则；4xx（含 401/403）视为无限制；5xx 或网络错误视为暂时不可用 ——
+  check() 返回 'unavailable'（网络错误时为 'unreachable'）与距缓存到期（即重抓 robots.txt）的秒数，
+  以及本次调用是否亲自请求了 robots.txt —— 只有亲自请求且连不上时调用方才计入 host 熔断，
+  命中本地 / 共享缓存或等别的协程的结果都不算。调用方不抓页面，
+  把条目停放到那时再试（每次停放计一次尝试）；不可用的结果缓存 error_ttl 秒。
+"""
+import asyncio
+import json
+import time
+from collections import OrderedDict
+from typing import Optional, Tuple
+from urllib.parse import urlsplit
+from urllib.robotparser import RobotFileParser
+
+ALLOW = 'allow'
+DISALLOW = 'disallow'
+UNAVAILABLE = 'unavailable'
+UNREACHABLE = 'unreachable'   # 同 UNAVAILABLE，但 robots.txt 请求没有拿到 HTTP 响应
+
+
+def url_origin(url: str) -> str:
+    u = urlsplit(url)
+    return f"{u.scheme}://{u.netloc}".lower()
+
+
+class _Rules:
+    __slots__ = ('kind', 'parser', 'delay', 'expires')
+
+    def __init__(self, kind: str, parser: Optional[RobotFileParser], delay: float, expires: float):
+        self.kind = kind          # 'rules' / 'allow_all' / UNAVAILABLE / UNREACHABLE
+        self.parser = parser
+        self.delay = delay
+        self.expires = expires
+
+
+class RobotsCache:
+    def __init__(self, fetch, *, agent: str, ttl: float = 6 * 3600, error_ttl: float = 300,
+                 max_hosts: int = 50_000, max_delay: float = 10.0,
+                 redis=None, redis_prefix: str = 'crawler:robots:'):
+        """fetch: async (url) -> (status or None, text)"""
+        self.fetch = fetch
+        self.agent = agent
+        self.ttl = ttl
+        self.error_ttl = error_ttl
+        self.max_hosts = max_hosts
+        self.max_delay = max_delay
+        self.redis = redis
+        self.redis_prefix = redis_prefix
+
+        self._cache: OrderedDict = OrderedDict()   # origin -> _Rules
+        self._inflight: dict = {}                  # origin -> Future[_Rules]
+        self._next_at: dict = {}                   # host -> 下一次允许请求的 monotonic 时间
+        self.counters = {
+            'fetched': 0, 'shared': 0, 'hits': 0,
+            'blocked': 0, 'unavailable': 0, 'parked': 0, 'paced': 0, 'paced_seconds': 0.0, 'deferred': 0,
+        }
+
+    # ---------- 查询 ----------
+    async def check(self, url: str) -> Tuple[str, float, bool]:
+        """
+        返回 (ALLOW / DISALLOW / UNAVAILABLE / UNREACHABLE, 秒数, fetched)：
+        ALLOW 时秒数为 crawl_delay，UNAVAILABLE / UNREACHABLE 时为距重试的秒数；
+        fetched 表示本次调用实际发出了 robots.txt 请求。
+        """
+        origin = url_origin(url)
+        rules = self._cache.get(origin)
+        fetched = False
+        if rules is not None and rules.expires > time.monotonic():
+            self._cache.move_to_end(origin)
+            self.counters['hits'] += 1
+        else:
+            rules, fetched = await self._get_rules(origin)
+
+        if rules.kind in (UNAVAILABLE, UNREACHABLE):
+            self.counters['unavailable'] += 1
+            return rules.kind, max(0.0, rules.expires - time.monotonic()), fetched
+        if rules.kind == 'rules' and not rules.parser.can_fetch(self.agent, url):
+            self.counters['blocked'] += 1
+            return DISALLOW, 0.0, fetched
+        return ALLOW, rules.delay, fetched
+
+    async def _get_rules(self, origin: str) -> Tuple[_Rules, bool]:
+        fut = self._inflight.get(origin)
+        if fut is not None:
+            return await asyncio.shield(fut), False
+
+        fut = asyncio.get_running_loop().create_future()
+        self._inflight[origin] = fut
+        try:
+            try:
+                rules, fetched = await self._load(origin)
+            except Exception:
+                rules, fetched = _Rules(UNAVAILABLE, None, 0.0, time.monotonic() + self.error_ttl), False
+            self._store(origin, rules)
+            fut.set_result(rules)
+            return rules, fetched
+        finally:
+            # 自身被取消或出错时，等待者按“不可用”处理，不会永远挂起
+            if not fut.done():
+                fut.set_result(_Rules(UNAVAILABLE, None, 0.0, 0.0))
+            self._inflight.pop(origin, None)
+
+    def _store(self, origin: str, rules: _Rules):
+        self._cache[origin] = rules
+        self._cache.move_to_end(origin)
+        while len(self._cache) > self.max_hosts:
+            self._cache.popitem(last=False)
+
+    # ---------- 抓取 / 共享缓存 ----------
+    async def _load(self, origin: str) -> Tuple[_Rules, bool]:
+        """返回 (规则, 是否实际请求了 robots.txt)；共享缓存命中时为 False。"""
+        key = self.redis_prefix + origin
+        if self.redis is not None:
+            try:
+                raw = await self.redis.get(key)
+            except Exception:
+                raw = None
+            if raw:
+                try:
+                    d = json.loads(raw)
+                    self.counters['shared'] += 1
+                    return self._build(d['status'], d['body'], d['fetched_at']), False
+                except (ValueError, KeyError, TypeError):
+                    pass
+
+        status, body = await self.fetch(origin + '/robots.txt')
+        self.counters['fetched'] += 1
+        now = time.time()
+        rules = self._build(status, body, now)
+        if self.redis is not None:
+            ex = self.error_ttl if rules.kind in (UNAVAILABLE, UNREACHABLE) else self.ttl
+            try:
+                await self.redis.set(key, json.dumps({'status': status, 'body': body, 'fetched_at': now}),
+                                     ex=max(1, int(ex)))
+            except Exception:
+                pass
+        return rules, True
+
+    def _build(self, status: Optional[int], body: str, fetched_at: float) -> _Rules:
+        if status is None:
+            ttl, kind, parser = self.error_ttl, UNREACHABLE, None
+        elif status >= 500:
+            ttl, kind, parser = self.error_ttl, UNAVAILABLE, None
+        elif status >= 400:
+            ttl, kind, parser = self.ttl, 'allow_all', None
+        else:
+            ttl, kind = self.ttl, 'rules'
+            parser = RobotFileParser()
+            parser.parse(body.splitlines())
+            parser.modified()   # can_fetch() 要求 last_checked 已设置
+        delay = 0.0
+        if parser is not None:
+            d = parser.crawl_delay(self.agent)
+            if d is None:
+                rate = parser.request_rate(self.agent)
+                if rate is not None and rate.requests:
+                    d = rate.seconds / rate.requests
+            delay = min(float(d or 0.0), self.max_delay)
+        # 共享缓存里的结果按原始抓取时间计算剩余有效期
+        remaining = max(0.0, fetched_at + ttl - time.time())
+        return _Rules(kind, parser, delay, time.monotonic() + remaining)
+
+    # ---------- Crawl-delay 限速 ----------
+    async def pace(self, host: str, delay: float) -> float:
+        """
+        同 host 两次请求至少间隔 delay 秒：预约下一个时间点，需要时 sleep 到那时，返回 0。
+        下一个空档在 max_delay 秒之后时不预约，返回距空档的秒数，由调用方停放。
+        """
+        if delay <= 0:
+            return 0.0
+        now = time.monotonic()
+        at = max(now, self._next_at.get(host, 0.0))
+        if at - now > self.max_delay:
+            self.counters['deferred'] += 1
+            return at - now
+        self._next_at[host] = at + delay
+        if len(self._next_at) > self.max_hosts:
+            self._next_at = {h: t for h, t in self._next_at.items() if t > now}
+        if at > now:
+            self.counters['paced'] += 1
+            self.counters['paced_seconds'] += at - now
+            await asyncio.sleep(at - now)
+        return 0.0
+
+    def note_parked(self, n: int):
+        self.counters['parked'] += n
+
+
+def robots_summary(counters: dict) -> str:
+    c = counters
+    return (f"robots: 抓取={c['fetched']:,} 共享命中={c['shared']:,} 禁止={c['blocked']:,} "
+            f"不可用={c['unavailable']:,}(停放={c['parked']:,}) 限速等待={c['paced']:,}({c['paced_seconds']:.0f}s) "
+            f"限速停放={c['deferred']:,}")
@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+TLS 握手成本控制：共享一个客户端 SSLContext，按 host 缓存 TLS 会话（session ticket / session id），
+同 host 的新连接自动尝试会话恢复（abbreviated handshake），并统计握手次数、恢复次数与握手耗时。
+
+与原来的 `ssl=False` 语义一致：不校验证书、不校验主机名，只是不再每条新连接都走完整握手。
+asyncio / uvloop 的 SSL 传输都通过 SSLContext.wrap_bio() 创建 SSLObject，这里就挂在这两个点上。
+"""
+import ssl
+import time
+from collections import OrderedDict
+from typing import Optional
+
+# 单进程最多缓存多少个 host 的会话（LRU）
+SESSION_CACHE_SIZE = 20_000
+
+
+class _TrackedSSLObject(ssl.SSLObject):
+    """记录握手墙钟时间与本线程 CPU 时间；握手完成后回调所属 context。"""
+    _hs_started: Optional[float] = None
+    _hs_cpu: float = 0.0
+    _hs_host: Optional[str] = None
+    _want_session = False
+
+    def do_handshake(self):
+        if self._hs_started is None:
+            self._hs_started = time.perf_counter()
+        c0 = time.thread_time()
+        try:
+            super().do_handshake()
+        finally:
+            self._hs_cpu += time.thread_time() - c0
+        self.context._on_handshake(self)
+
+    def read(self, len=1024, buffer=None):
+        data = super().read(len, buffer)
+        # TLS 1.3 的 NewSessionTicket 在握手后随应用数据到达，读到数据后再取会话
+        if self._want_session:
+            self.context._capture(self)
+        return data
+
+
+class ResumingSSLContext(ssl.SSLContext):
+    sslobject_class = _TrackedSSLObject
+
+    def __new__(cls, resume: bool = True):
+        return super().__new__(cls, ssl.PROTOCOL_TLS_CLIENT)
+
+    def __init__(self, resume: bool = True):
+        super().__init__()
+        self.resume = resume
+        self._sessions: "OrderedDict[str, ssl.SSLSession]" = OrderedDict()
+        self.counters = {
+            'tls_handshakes': 0,
+            'tls_resumed': 0,
+            'tls_handshake_s': 0.0,
+            'tls_handshake_cpu_s': 0.0,
+        }
+
+    def wrap_bio(self, incoming, outgoing, server_side=False, server_hostname=None, session=None):
+        if self.resume and session is None and not server_side and server_hostname:
+            session = self._lookup(server_hostname)
+        obj = super().wrap_bio(incoming, outgoing, server_side=server_side,
+                               server_hostname=server_hostname, session=session)
+        obj._hs_host = server_hostname
+        return obj
+
+    def _lookup(self, host: str) -> Optional[ssl.SSLSession]:
+        s = self._sessions.get(host)
+        if s is None:
+            return None
+        if s.time + s.timeout < time.time():
+            self._sessions.pop(host, None)
+            return None
+        self._sessions.move_to_end(host)
+        return s
+
+    def _capture(self, obj: _TrackedSSLObject):
+        try:
+            s = obj.session
+        except Exception:
+            s = None
+        if s is None or not (s.has_ticket or s.id):
+            return
+        obj._want_session = False
+        self._sessions[obj._hs_host] = s
+        self._sessions.move_to_end(obj._hs_host)
+        while len(self._sessions) > SESSION_CACHE_SIZE:
+            self._sessions.popitem(last=False)
+
+    def _on_handshake(self, obj: _TrackedSSLObject):
+        c = self.counters
+        c['tls_handshakes'] += 1
+        if obj.session_reused:
+            c['tls_resumed'] += 1
+        c['tls_handshake_s'] += time.perf_counter() - (obj._hs_started or time.perf_counter())
+        c['tls_handshake_cpu_s'] += obj._hs_cpu
+        if self.resume and obj._hs_host:
+            obj._want_session = True
+            self._capture(obj)
+
+
+def make_client_context(resume: bool = True) -> ResumingSSLContext:
+    """等价于 aiohttp 的 ssl=False（不校验证书），但带会话恢复与握手统计。"""
+    ctx = ResumingSSLContext(resume=resume)
+    ctx.check_hostname = False
+    ctx.verify_mode = ssl.CERT_NONE
+    ctx.options |= ssl.OP_NO_COMPRESSION
+    return ctx
+
+
+def tls_summary(counters: dict) -> str:
+    n = counters['tls_handshakes']
+    if not n:
+        return "TLS握手=0"
+    return (
+        f"TLS握手={n:,} (恢复={counters['tls_resumed'] / n:.1%}, "
+        f"平均={counters['tls_handshake_s'] / n * 1000:.1f}ms, "
+        f"CPU={counters['tls_handshake_cpu_s'] / n * 1000:.2f}ms/次)"
+    )
@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+"""
+出口池本地演练：不需要真实代理，全部在回环地址上完成（Linux：整个 127.0.0.0/8 都可作源地址）。
+
+  - 源站：127.0.0.1 上的 HTTP 服务，按对端 IP 判断“被封”的出口，对其返回 --ban-status（默认 429）
+  - 代理替身：若干个最小 HTTP 正向代理，各自以不同的 127.0.0.x 作为出站源地址连接源站
+  - 出口：local:127.0.0.2 + 每个代理替身一个 http://127.0.0.1:<port>；其中 --banned 个代理的源地址被源站封禁
+
+客户端用 aio_crawler_egress.EgressPool 对 --hosts 个虚拟 host（h<i>.test，解析 / 代理转发一律指向回环源站）
+发 --requests 个请求，每秒打印一行出口统计；结束时被封的出口应已退役，其余出口分摊全部流量。
+
+用法：python bench_egress.py [--requests 3000] [--proxies 3] [--banned 1] [--sticky] [--host-rate 0]
+"""
+import argparse
+import asyncio
+import socket
+import time
+
+import aiohttp
+
+from aio_crawler_egress import RETIRED, EgressPool, egress_summary
+
+BODY = b"<html><title>ok</title>" + b"x" * 2048 + b"</html>"
+
+
+async def _head(reader) -> bytes:
+    return await reader.readuntil(b"\r\n\r\n")
+
+
+def _origin(banned: set, ban_status: int):
+    async def handle(reader, writer):
+        try:
+            await _head(reader)
+            peer = writer.get_extra_info('peername')[0]
+            if peer in banned:
+                writer.write(f"HTTP/1.1 {ban_status} Blocked\r\nContent-Length: 0\r\nConnection: close\r\n\r\n".encode())
+            else:
+                writer.write(b"HTTP/1.1 200 OK\r\nContent-Type: text/html; charset=utf-8\r\n"
+                             b"Content-Length: %d\r\nConnection: close\r\n\r\n" % len(BODY) + BODY)
+            await writer.drain()
+        except Exception:
+            pass
+        finally:
+            writer.close()
+    return handle
+
+
+class _LoopbackResolver(aiohttp.abc.AbstractResolver):
+    """所有域名都解析到 127.0.0.1，虚拟 host 不必写进 /etc/hosts。"""
+
+    async def resolve(self, host, port=0, family=socket.AF_INET):
+        return [{'hostname': host, 'host': '127.0.0.1', 'port': port,
+                 'family': socket.AF_INET, 'proto': 0, 'flags': socket.AI_NUMERICHOST}]
+
+    async def close(self):
+        pass
+
+
+def _proxy(source: str):
+    """只支持绝对 URI 的 GET（aiohttp 经 http 代理抓 http:// 时的形式），虚拟 host 一律转发到 127.0.0.1；
+    每个请求一条上游连接。"""
+    async def handle(reader, writer):
+        try:
+            head = await _head(reader)
+            line, _, rest = head.partition(b"\r\n")
+            method, target, version = line.split(b" ", 2)
+            hostport, _, path = target.split(b"://", 1)[1].partition(b"/")
+            _, _, port = hostport.partition(b":")
+            up_r, up_w = await asyncio.open_connection('127.0.0.1', int(port or 80), local_addr=(source, 0))
+            headers = [h for h in rest.split(b"\r\n") if h and not h.lower().startswith((b"proxy-", b"connection:"))]
+            up_w.write(b"%s /%s %s\r\n" % (method, path, version) + b"\r\n".join(headers)
+                       + b"\r\nConnection: close\r\n\r\n")
+            await up_w.drain()
+            writer.write(await up_r.read())
+            await writer.drain()
+            up_w.close()
+        except Exception:
+            pass
+        finally:
+            writer.close()
+    return handle
+
+
+async def _start(handler, host: str = '127.0.0.1') -> tuple:
+    server = await asyncio.start_server(handler, host, 0)
+    return server, server.sockets[0].getsockname()[1]
+
+
+async def _fetch(e, url: str):
+    try:
+        async with e.get(url, timeout=aiohttp.ClientTimeout(total=5)) as resp:
+            await resp.read()
+            return resp.status < 400, resp.status, ''
+    except Exception:
+        return False, None, ''
+
+
+async def run(args):
+    sources = [f"127.0.0.{10 + i}" for i in range(args.proxies)]
+    banned = set(sources[:args.banned])
+    servers = []
+    origin, port = await _start(_origin(banned, args.ban_status))
+    servers.append(origin)
+    specs = ['local:127.0.0.2']
+    for src in sources:
+        server, p = await _start(_proxy(src))
+        servers.append(server)
+        specs.append(f"http://127.0.0.1:{p}")
+
+    pool = EgressPool(specs, sticky=args.sticky, host_rate=args.host_rate, ban_status={args.ban_status},
+                      min_samples=args.min_samples, retire_cooldown=600)
+    pool.open(lambda e: aiohttp.ClientSession(connector=e.connector(limit=args.concurrency, limit_per_host=6,
+                                                                   resolver=_LoopbackResolver())),
+              None)
+    print(f"出口: {', '.join(f'{e.name}({e.spec})' for e in pool.egresses)}；被封源地址: {', '.join(sorted(banned)) or '-'}")
+
+    queue: asyncio.Queue = asyncio.Queue()
+    for i in range(args.requests):
+        queue.put_nowait(f"http://h{i % args.hosts}.test:{port}/{i}")
+    ok = 0
+
+    async def worker():
+        nonlocal ok
+        while not queue.empty():
+            url = queue.get_nowait()
+            res = await pool.fetch(url, lambda e: _fetch(e, url))
+            ok += res[0]
+
+    async def report():
+        while True:
+            await asyncio.sleep(1)
+            print(f"  {egress_summary(pool.counters)}")
+
+    t0 = time.perf_counter()
+    reporter = asyncio.create_task(report())
+    await asyncio.gather(*(worker() for _ in range(args.concurrency)))
+    reporter.cancel()
+    elapsed = time.perf_counter() - t0
+
+    await pool.aclose()
+    for server in servers:
+        server.close()
+    print(f"完成: 请求={args.requests:,} 成功={ok:,} 用时={elapsed:.2f}s ({args.requests / elapsed:.0f} req/s)")
+    print(egress_summary(pool.counters))
+    proxied_banned = {e.name for e, src in zip(pool.egresses[1:], sources) if src in banned}
+    retired = {e.name for e in pool.egresses if e.counters['retired']}
+    print(f"被封出口已退役: {'是' if proxied_banned <= retired else '否'}"
+          + (f"（误退役: {', '.join(sorted(retired - proxied_banned))}）" if retired - proxied_banned else ""))
+    still = [e.name for e in pool.egresses if e.state == RETIRED]
+    print(f"当前退役: {', '.join(still) or '-'}")
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    ap.add_argument('--requests', type=int, default=3000)
+    ap.add_argument('--hosts', type=int, default=50)
+    ap.add_argument('--concurrency', type=int, default=50)
+    ap.add_argument('--proxies', type=int, default=3, help='代理替身个数')
+    ap.add_argument('--banned', type=int, default=1, help='其中被源站封禁的个数')
+    ap.add_argument('--ban-status', type=int, default=429)
+    ap.add_argument('--min-samples', type=int, default=30)
+    ap.add_argument('--sticky', action='store_true')
+    ap.add_argument('--host-rate', type=float, default=0.0, help='每个出口对单个 host 的请求上限（次/秒）')
+    asyncio.run(run(ap.parse_args()))
+
+
+if __name__ == '__main__':
+    main()
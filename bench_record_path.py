@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+每次尝试在 worker 热路径上的 CPU 开销基准（不含网络）：
+
+  before: 旧实现 —— parse_entry 元组 + 每条 strftime(gmtime) + urlparse(url).netloc
+          + 构造 record dict + 再包一层 {'success', 'record'} 放进写库队列
+  after : aio_crawler_records —— Task（host 随条目解析一次）+ 按秒缓存的时间戳
+          + __slots__ Result 直接入队，写库时才 to_doc()
+
+两条路径都走完“解析条目 -> 构造结果 -> 写库前得到文档”，成功 / 失败按比例混合。
+用法：python bench_record_path.py [--n 300000] [--fail-ratio 0.3]
+"""
+import argparse
+import time
+from urllib.parse import urlparse
+
+from aio_crawler_records import Result, parse_task, utc_ts
+
+HTML = "<html><head><title>ok</title></head><body>" + "x" * 2000 + "</body></html>"
+
+
+def _old_parse_entry(entry_bytes: bytes):
+    s = entry_bytes.decode()
+    head, url = s.split(' ', 1)
+    if '#' in head:
+        base_idx_str, attempt_str = head.split('#', 1)
+        base_idx = int(base_idx_str)
+        attempt = int(attempt_str)
+    else:
+        base_idx = int(head)
+        attempt = 1
+    return base_idx, attempt, url
+
+
+def before(entries, fails, run_id):
+    out = []
+    for entry, failed in zip(entries, fails):
+        base_idx, attempt, url = _old_parse_entry(entry)
+        idx = f"{run_id}-{base_idx}" if run_id else base_idx
+        ts = time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime())
+        if not failed:
+            record = {
+                '_id': idx,
+                'url': url,
+                'host': urlparse(url).netloc,
+                'http_status_code': 200,
+                'html': HTML,
+                'crawl_timestamp': ts,
+            }
+            out.append({'success': True, 'record': record})
+        else:
+            record = {
+                'task_id': idx,
+                'url': url,
+                'host': urlparse(url).netloc,
+                'status': 'ERR',
+                'failed_at': ts,
+                'rounds': attempt,
+            }
+            out.append({'success': False, 'record': record})
+    return [item['record'] for item in out]
+
+
+def after(entries, fails, run_id):
+    out = []
+    for entry, failed in zip(entries, fails):
+        task = parse_task(entry)
+        if not failed:
+            out.append(Result(True, task, 200, HTML, utc_ts(), run_id))
+        else:
+            out.append(Result(False, task, None, None, utc_ts(), run_id))
+    return [r.to_doc() for r in out]
+
+
+def _measure(fn, entries, fails, run_id, rounds=3):
+    best = None
+    for _ in range(rounds):
+        c0 = time.process_time()
+        docs = fn(entries, fails, run_id)
+        cpu = time.process_time() - c0
+        best = cpu if best is None else min(best, cpu)
+    return best, docs
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument('--n', type=int, default=300_000)
+    ap.add_argument('--fail-ratio', type=float, default=0.3)
+    ap.add_argument('--run-id', type=int, default=177)
+    args = ap.parse_args()
+
+    hosts = [f"site{i}.example.com" for i in range(5000)]
+    entries = []
+    for i in range(args.n):
+        url = f"https://{hosts[i % len(hosts)]}/path/{i}?q={i % 7}"
+        entries.append((f"{i}#{1 + i % 3} {url}" if i % 4 else f"{i} {url}").encode())
+    step = int(1 / args.fail_ratio) if args.fail_ratio > 0 else 0
+    fails = [bool(step) and i % step == 0 for i in range(args.n)]
+
+    b_cpu, b_docs = _measure(before, entries, fails, args.run_id)
+    a_cpu, a_docs = _measure(after, entries, fails, args.run_id)
+    assert len(a_docs) == len(b_docs)
+    for x, y in zip(a_docs[:1000], b_docs[:1000]):
+        assert {k: v for k, v in x.items() if k not in ('crawl_timestamp', 'failed_at')} == \
+               {k: v for k, v in y.items() if k not in ('crawl_timestamp', 'failed_at')}
+
+    print(f"before: {b_cpu / args.n * 1e6:.2f} µs/attempt CPU")
+    print(f"after : {a_cpu / args.n * 1e6:.2f} µs/attempt CPU")
+    print(f"降低 {1 - a_cpu / b_cpu:.1%}（n={args.n:,}, fail_ratio={args.fail_ratio}）")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""
+TLS 会话恢复基准：本地起一个 HTTPS 服务（独立进程，自签证书），
+客户端对同一 host 顺序新建 N 条连接，各发一个 GET，比较：
+  - plain : 普通客户端 context（等价 aiohttp ssl=False，每条连接完整握手）
+  - resume: aio_crawler_tls.make_client_context()（会话恢复）
+输出每条连接平均延迟、客户端进程 CPU，以及握手统计。
+
+用法：python bench_tls_resume.py [--conns 500] [--tls12]
+需要系统里有 openssl 命令行用于生成自签证书。
+"""
+import argparse
+import asyncio
+import multiprocessing as mp
+import os
+import ssl
+import subprocess
+import tempfile
+import time
+
+from aio_crawler_tls import make_client_context, tls_summary
+
+RESPONSE = b"HTTP/1.1 200 OK\r\nContent-Length: 2\r\nConnection: close\r\n\r\nok"
+
+
+def _make_cert(tmpdir: str):
+    cert = os.path.join(tmpdir, 'cert.pem')
+    key = os.path.join(tmpdir, 'key.pem')
+    subprocess.run(
+        ['openssl', 'req', '-x509', '-newkey', 'rsa:2048', '-nodes', '-days', '1',
+         '-subj', '/CN=localhost', '-keyout', key, '-out', cert],
+        check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    return cert, key
+
+
+def _serve(cert: str, key: str, port_q, tls12: bool):
+    async def handle(reader, writer):
+        try:
+            await reader.readuntil(b"\r\n\r\n")
+            writer.write(RESPONSE)
+            await writer.drain()
+        except Exception:
+            pass
+        finally:
+            writer.close()
+
+    async def run():
+        ctx = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+        ctx.load_cert_chain(cert, key)
+        if tls12:
+            ctx.maximum_version = ssl.TLSVersion.TLSv1_2
+        server = await asyncio.start_server(handle, '127.0.0.1', 0, ssl=ctx)
+        port_q.put(server.sockets[0].getsockname()[1])
+        async with server:
+            await server.serve_forever()
+
+    asyncio.run(run())
+
+
+async def _run_client(ctx: ssl.SSLContext, port: int, conns: int):
+    lat = 0.0
+    for _ in range(conns):
+        t0 = time.perf_counter()
+        reader, writer = await asyncio.open_connection('127.0.0.1', port, ssl=ctx, server_hostname='localhost')
+        writer.write(b"GET / HTTP/1.1\r\nHost: localhost\r\n\r\n")
+        await writer.drain()
+        await reader.read()
+        writer.close()
+        try:
+            await writer.wait_closed()
+        except Exception:
+            pass
+        lat += time.perf_counter() - t0
+    return lat / conns
+
+
+def _bench(name: str, ctx: ssl.SSLContext, port: int, conns: int):
+    c0 = time.process_time()
+    avg = asyncio.run(_run_client(ctx, port, conns))
+    cpu = time.process_time() - c0
+    line = f"{name:<7} conns={conns} | 平均延迟={avg * 1000:.2f}ms | 客户端CPU={cpu:.3f}s ({cpu / conns * 1000:.3f}ms/连接)"
+    if hasattr(ctx, 'counters'):
+        line += f" | {tls_summary(ctx.counters)}"
+    print(line)
+    return avg, cpu
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument('--conns', type=int, default=500)
+    ap.add_argument('--tls12', action='store_true', help='服务端限制为 TLS 1.2')
+    args = ap.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        cert, key = _make_cert(tmp)
+        port_q = mp.Queue()
+        server = mp.Process(target=_serve, args=(cert, key, port_q, args.tls12), daemon=True)
+        server.start()
+        try:
+            port = port_q.get(timeout=10)
+
+            asyncio.run(_run_client(make_client_context(resume=False), port, 20))  # 预热
+
+            plain = make_client_context(resume=False)
+            resume = make_client_context(resume=True)
+            p_avg, p_cpu = _bench('plain', plain, port, args.conns)
+            r_avg, r_cpu = _bench('resume', resume, port, args.conns)
+
+            print(f"\n延迟降低={1 - r_avg / p_avg:.1%} | 客户端CPU降低={1 - r_cpu / p_cpu:.1%}")
+        finally:
+            server.terminate()
+            server.join()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""
+输入层断点续推自检：同一份数据分别写成明文 / .gz / .zst（未安装 zstandard 时跳过）的 csv 与 jsonl，
+先完整读一遍，再从中间某条记录之后的检查点位置续推，续推结果必须与完整读取的后半段一致。
+
+用法：python check_input_resume.py [--rows 20000]
+"""
+import argparse
+import gzip
+import json
+import os
+import tempfile
+
+from aio_crawler_input import Source, iter_records
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+
+def _write(path: str, data: bytes):
+    if path.endswith('.gz'):
+        with gzip.open(path, 'wb') as f:
+            f.write(data)
+    elif path.endswith('.zst'):
+        with open(path, 'wb') as f:
+            f.write(zstandard.ZstdCompressor().compress(data))
+    else:
+        with open(path, 'wb') as f:
+            f.write(data)
+
+
+def _check(src: Source) -> int:
+    full = list(iter_records(src))
+    mid = len(full) // 2
+    _, _, offset, row = full[mid - 1]
+    resumed = list(iter_records(src, offset, row))
+    assert resumed == full[mid:], f"{src.path}: 从 offset={offset} 续推的结果与完整读取不一致"
+    return len(full)
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument('--rows', type=int, default=20_000)
+    args = ap.parse_args()
+
+    urls = [f"https://site{i % 97}.example.com/p/{i}?q=\"{i % 7}\"" for i in range(args.rows)]
+    payloads = {
+        'csv': ("id,url\n" + "".join('%d,"%s"\n' % (i, u.replace('"', '""')) for i, u in enumerate(urls))).encode(),
+        'jsonl': "".join(json.dumps({'id': i, 'url': u, 'note': '中文'}, ensure_ascii=False) + "\n"
+                         for i, u in enumerate(urls)).encode(),
+    }
+    suffixes = ['', '.gz'] + (['.zst'] if zstandard is not None else [])
+    with tempfile.TemporaryDirectory() as tmp:
+        for fmt, data in payloads.items():
+            for suffix in suffixes:
+                path = os.path.join(tmp, f"input.{fmt}{suffix}")
+                _write(path, data)
+                n = _check(Source(path, url_column='url', id_column='id'))
+                print(f"ok: {os.path.basename(path)} ({n:,} 条)")
+    if zstandard is None:
+        print("跳过 .zst（未安装 zstandard）")
+
+
+if __name__ == '__main__':
+    main()